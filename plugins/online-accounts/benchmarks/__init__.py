@@ -0,0 +1,9 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmarks of the Todoist sync engine, run on synthetic accounts:
+
+    python3 -m benchmarks --items 10000 --output results.json \
+        --baseline baseline.json
+
+from the plugins/online-accounts directory.  See python3 -m benchmarks -h.
+"""
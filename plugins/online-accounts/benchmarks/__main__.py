@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import statistics
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__))), 'online-accounts'))
+
+from .accounts import generate_account
+from .scenarios import SCENARIOS
+
+
+def measure(function, account, repeat):
+    """
+    Runs a scenario repeat times, each one after its own setup, and returns
+    the durations in seconds.
+    """
+    durations = []
+    for _ in range(repeat):
+        run = function(account)
+        start = time.perf_counter()
+        run()
+        durations.append(time.perf_counter() - start)
+    return durations
+
+
+def compare(results, baseline, tolerance):
+    """
+    Returns the scenarios whose median is more than tolerance (a fraction)
+    slower than in the baseline, with the ratio of their medians.
+    """
+    regressions = {}
+    for size, scenarios in results['results'].items():
+        for name, result in scenarios.items():
+            try:
+                reference = baseline['results'][size][name]['median']
+            except KeyError:
+                continue
+            ratio = result['median'] / reference if reference else 1.0
+            if ratio > 1 + tolerance:
+                regressions['%s/%s' % (size, name)] = ratio
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='benchmarks',
+        description='Benchmarks the Todoist sync engine on synthetic '
+                    'accounts.')
+    parser.add_argument('--items', type=int, nargs='+', default=[1000, 10000],
+                        help='sizes of the accounts, in items')
+    parser.add_argument('--scenario', action='append', choices=sorted(
+        SCENARIOS), help='scenarios to run (all by default)')
+    parser.add_argument('--repeat', type=int, default=5,
+                        help='runs of each scenario')
+    parser.add_argument('--output', help='JSON file to write results to')
+    parser.add_argument('--baseline', help='JSON results to compare with')
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help='slowdown over the baseline reported as a '
+                             'regression, as a fraction')
+    args = parser.parse_args(argv)
+
+    results = {
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'repeat': args.repeat,
+        'results': {},
+    }
+    for items in args.items:
+        account = generate_account(items)
+        scenarios = results['results'][str(items)] = {}
+        for name in args.scenario or sorted(SCENARIOS):
+            durations = measure(SCENARIOS[name], account, args.repeat)
+            scenarios[name] = {
+                'min': min(durations),
+                'median': statistics.median(durations),
+                'runs': durations,
+            }
+            print('%8d items  %-24s %10.4fs' % (
+                items, name, scenarios[name]['median']))
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for name, ratio in sorted(regressions.items()):
+            print('REGRESSION %s: %.2fx the baseline' % (name, ratio))
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
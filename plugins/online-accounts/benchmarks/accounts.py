@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+import random
+import datetime
+
+from todoist.dates import format_datetime
+
+
+def generate_account(items=1000, seed=0):
+    """
+    Returns the response of a full sync of a synthetic account with the given
+    number of items, and in proportion projects, labels, notes, reminders,
+    filters and collaborators.  The same seed gives the same account.
+    """
+    rng = random.Random(seed)
+    ids = iter(range(1, 10 ** 9))
+    now = datetime.datetime(2016, 10, 17, tzinfo=datetime.timezone.utc)
+
+    labels = [{'id': next(ids), 'name': 'label%d' % n, 'color': n % 13,
+               'item_order': n, 'is_deleted': 0}
+              for n in range(20)]
+    projects = [{'id': next(ids), 'name': 'Project %d' % n,
+                 'color': n % 22, 'indent': 1 if n % 5 == 0 else 2,
+                 'item_order': n, 'collapsed': 0, 'shared': n % 10 == 0,
+                 'is_deleted': 0, 'is_archived': 0, 'inbox_project': n == 0}
+                for n in range(max(1, items // 50))]
+    projects[0]['name'] = 'Inbox'
+    collaborators = [{'id': next(ids), 'email': 'user%d@example.com' % n,
+                      'full_name': 'User %d' % n, 'timezone': 'UTC'}
+                     for n in range(10)]
+    collaborator_states = [
+        {'project_id': project['id'], 'user_id': collaborator['id'],
+         'state': 'active', 'is_deleted': False}
+        for project in projects if project['shared']
+        for collaborator in collaborators[:3]]
+
+    item_list = []
+    for n in range(items):
+        due = None
+        if rng.random() < 0.6:
+            due = format_datetime(now + datetime.timedelta(
+                days=rng.randint(-30, 60), hours=rng.randint(0, 23)))
+        item_list.append({
+            'id': next(ids),
+            'content': 'Task %d %s' % (n, 'x' * rng.randint(5, 60)),
+            'project_id': rng.choice(projects)['id'],
+            'labels': [label['id'] for label in
+                       rng.sample(labels, rng.randint(0, 3))],
+            'priority': rng.randint(1, 4),
+            'checked': int(rng.random() < 0.1),
+            'due_date_utc': due,
+            'date_string': due and 'every day',
+            'indent': 1,
+            'item_order': n,
+            'day_order': -1,
+            'collapsed': 0,
+            'in_history': 0,
+            'is_deleted': 0,
+            'is_archived': 0,
+            'user_id': collaborators[0]['id'],
+            'date_added': format_datetime(now),
+        })
+    notes = [{'id': next(ids), 'item_id': rng.choice(item_list)['id'],
+              'content': 'Note %d' % n, 'posted': format_datetime(now),
+              'is_deleted': 0, 'file_attachment': None}
+             for n in range(items // 5)]
+    reminders = [{'id': next(ids), 'item_id': rng.choice(item_list)['id'],
+                  'type': 'absolute', 'due_date_utc': format_datetime(now),
+                  'service': 'push', 'is_deleted': 0}
+                 for n in range(items // 20)]
+    filters = [{'id': next(ids), 'name': 'Filter %d' % n,
+                'query': 'p%d & 7 days' % (n % 4 + 1), 'color': n,
+                'item_order': n, 'is_deleted': 0}
+               for n in range(5)]
+    return {
+        'sync_token': 'initial',
+        'full_sync': True,
+        'collaborators': collaborators,
+        'collaborator_states': collaborator_states,
+        'day_orders': {},
+        'filters': filters,
+        'items': item_list,
+        'labels': labels,
+        'live_notifications': [],
+        'locations': [],
+        'notes': notes,
+        'project_notes': [],
+        'projects': projects,
+        'reminders': reminders,
+        'user': {'id': collaborators[0]['id'], 'email': 'user0@example.com',
+                 'inbox_project': projects[0]['id']},
+    }
+
+
+def generate_delta(account, fraction=0.01, seed=1):
+    """
+    Returns the response of an incremental sync changing a fraction of the
+    items of an account: updating most of them, deleting some, and adding
+    as many new ones.
+    """
+    rng = random.Random(seed)
+    count = max(1, int(len(account['items']) * fraction))
+    changed = rng.sample(account['items'], count)
+    items = []
+    for n, item in enumerate(changed):
+        item = dict(item)
+        if n % 10 == 0:
+            item['is_deleted'] = 1
+        else:
+            item['content'] += ' (edited)'
+            item['priority'] = rng.randint(1, 4)
+        items.append(item)
+    last_id = max(item['id'] for item in account['items'])
+    for n in range(count):
+        item = dict(rng.choice(account['items']), id=last_id + 1 + n)
+        item['content'] = 'New task %d' % n
+        items.append(item)
+    return {'sync_token': 'delta', 'full_sync': False, 'items': items}
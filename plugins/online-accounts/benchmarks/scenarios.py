@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+import random
+import shutil
+import tempfile
+
+from todoist.api import TodoistAPI
+from todoist.fake import FakeTodoistServer
+from todoist.optimizer import optimize, split_commands
+
+from .accounts import generate_delta
+
+
+# Scenarios by name.  Each one is called with the account, does the setup
+# that is not measured, and returns the function to time.
+SCENARIOS = {}
+
+
+def scenario(function):
+    SCENARIOS[function.__name__] = function
+    return function
+
+
+def new_api(cache=None, **kwargs):
+    return TodoistAPI('benchmark', cache=cache, transport=FakeTodoistServer(),
+                      **kwargs)
+
+
+def loaded_api(account, cache=None, **kwargs):
+    api = new_api(cache, **kwargs)
+    api._update_state(dict(account))
+    return api
+
+
+@scenario
+def initial_update_state(account):
+    api = new_api()
+    return lambda: api._update_state(dict(account))
+
+
+@scenario
+def incremental_merge(account):
+    api = loaded_api(account)
+    delta = generate_delta(account)
+    return lambda: api._update_state(delta)
+
+
+@scenario
+def get_by_id(account):
+    api = loaded_api(account)
+    ids = [item['id'] for item in account['items']]
+    rng = random.Random(0)
+    lookups = [rng.choice(ids) for _ in range(100000)]
+
+    def run():
+        get = api.items.get_by_id
+        for item_id in lookups:
+            get(item_id, only_local=True)
+    return run
+
+
+@scenario
+def replace_temp_id(account):
+    api = loaded_api(account)
+    project_id = account['projects'][0]['id']
+    items = [api.items.add('New task %d' % n, project_id)
+             for n in range(1000)]
+    first_id = max(item['id'] for item in account['items']) + 1
+
+    def run():
+        for n, item in enumerate(items):
+            api._replace_temp_id(item.temp_id, first_id + n)
+    return run
+
+
+def _cache_scenarios(backend):
+    def write_cache(account):
+        directory = tempfile.mkdtemp()
+        api = loaded_api(account, cache=directory + '/',
+                         cache_backend=backend)
+
+        def run():
+            try:
+                api._write_cache()
+            finally:
+                api.close()
+                shutil.rmtree(directory)
+        return run
+
+    def read_cache(account):
+        directory = tempfile.mkdtemp()
+        api = loaded_api(account, cache=directory + '/',
+                         cache_backend=backend)
+        api._write_cache()
+        api.close()
+
+        def run():
+            try:
+                new_api(cache=directory + '/', cache_backend=backend).close()
+            finally:
+                shutil.rmtree(directory)
+        return run
+
+    SCENARIOS['write_cache_' + backend] = write_cache
+    SCENARIOS['read_cache_' + backend] = read_cache
+
+
+_cache_scenarios('json')
+_cache_scenarios('sqlite')
+
+
+@scenario
+def commit_serialisation(account):
+    api = loaded_api(account)
+    items = account['items']
+    project_id = account['projects'][0]['id']
+    for n, item in enumerate(items[:2000]):
+        api.items.update(item['id'], content=item['content'] + ' (edited)')
+        if n % 2:
+            api.items.update(item['id'], priority=4)
+        if n % 10 == 0:
+            api.items.add('New task %d' % n, project_id)
+    api.items.complete([item['id'] for item in items[2000:2500]])
+
+    def run():
+        optimized = optimize(api.queue)
+        for chunk in split_commands(optimized.commands, 100):
+            api._sync_data(chunk, ['all'])
+    return run
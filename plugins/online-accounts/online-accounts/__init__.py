@@ -26,6 +26,7 @@ from gi.repository import Gtd, Gtk, GObject
 
 from .accounts import AccountsManager, Account, SERVICES
 from .providers import CreateProvider
+from .scheduler import SyncScheduler
 
 from os import path
 
@@ -37,6 +38,41 @@ for service in SERVICES:
 def get_local_file(filename):
     return path.join(path.dirname(path.abspath(__file__)), filename)
 
+def format_size(size):
+    for unit in ('B', 'kB', 'MB'):
+        if size < 1000:
+            break
+        size /= 1000
+    else:
+        unit = 'GB'
+    return '%.3g %s' % (size, unit)
+
+def format_metrics(snapshot):
+    """Summarizes a snapshot of the metrics of a provider"""
+    histograms = snapshot['histograms']
+    counters = snapshot['counters']
+    lines = []
+    sync = histograms.get('sync')
+    if sync:
+        lines.append('%d syncs, median %.2f s, slowest %.2f s' % (
+            sync['count'], sync['p50'], sync['max']))
+    else:
+        lines.append('Not synchronized yet')
+    lines.append('%s received, %s sent' % (
+        format_size(counters.get('bytes_received', 0)),
+        format_size(counters.get('bytes_sent', 0))))
+    commands = histograms.get('commands_per_commit')
+    if commands:
+        lines.append('%d commits, %d commands' % (
+            commands['count'], commands['total']))
+    if snapshot['gauges'].get('queue_depth'):
+        lines.append('%d changes waiting to be sent' %
+                     snapshot['gauges']['queue_depth'])
+    cache = histograms.get('cache.write')
+    if cache:
+        lines.append('Cache writes: median %.2f s' % cache['p50'])
+    return '\n'.join(lines)
+
 
 class HeaderButton(Gtk.Button):
 
@@ -107,10 +143,11 @@ class PreferencesPanel(Gtk.Stack):
     _ui_file = get_local_file("preferences-panel.ui")
     _selected_account = None
 
-    def __init__(self, accounts_manager):
+    def __init__(self, accounts_manager, providers=()):
         Gtk.Stack.__init__(self)
         self.set_transition_type(Gtk.StackTransitionType.SLIDE_UP)
         self.accounts_manager = accounts_manager
+        self.providers = providers
         self.builder = Gtk.Builder.new_from_file(self._ui_file)
         self.builder.connect_signals(self)
         self._helper_build_ui()
@@ -127,6 +164,7 @@ class PreferencesPanel(Gtk.Stack):
         self.image_service = _get('image_service')
         self.entry_name = _get('entry_name')
         self.switch_active = _get('switch_active')
+        self.label_metrics = _get('label_metrics')
         self.combo_service = _get('combo_service')
         self.combo_service.connect("changed", self.on_service_changed)
         self.combo_service.set_model(SERVICES_LIST)
@@ -153,6 +191,17 @@ class PreferencesPanel(Gtk.Stack):
         self.combo_service.set_active_id(account.service)
         self.switch_active.set_active(account.active)
         self._helper_change_image(account.service)
+        self._helper_write_metrics(account)
+
+    def _helper_write_metrics(self, account):
+        for provider in self.providers:
+            metrics = getattr(provider, 'metrics', None)
+            if provider.get_property('account') is account and metrics:
+                self.label_metrics.set_label(
+                    format_metrics(metrics.snapshot()))
+                self.label_metrics.show()
+                return
+        self.label_metrics.hide()
 
     def _helper_change_image(self, service=None):
         self.image_service.set_from_icon_name(
@@ -167,6 +216,7 @@ class PreferencesPanel(Gtk.Stack):
         self.combo_service.set_active_id(None)
         self.switch_active.set_active(False)
         self.image_service.set_from_icon_name('goa-panel', 64)
+        self.label_metrics.hide()
 
     def _helper_save_data(self):
         account = self._selected_account
@@ -216,34 +266,66 @@ class Plugin(GObject.Object, Gtd.Activatable):
     def __init__(self):
         GObject.Object.__init__(self)
         self._providers = []
+        self.scheduler = SyncScheduler()
+        self._window = None
         self.header_button = HeaderButton(self.manually_sync)
+        self.header_button.connect(
+            'hierarchy-changed',
+            self.on_header_hierarchy_changed,
+            )
         self.accounts_manager = AccountsManager()
         self.accounts_manager.connect(
             'notify::ready',
             self.on_accounts_manager_ready,
             )
-        self.preferences_panel = PreferencesPanel(self.accounts_manager)
+        self.preferences_panel = PreferencesPanel(
+            self.accounts_manager,
+            self._providers,
+            )
 
     def on_accounts_manager_ready(self, accounts_manager, param):
+        # The providers load in parallel on the worker threads, and each one
+        # is added as soon as it is ready
         if accounts_manager.get_ready():
             for i in range(accounts_manager.get_n_items()):
                 account = accounts_manager.get_item(i)
                 provider = CreateProvider(account)
-                self.add_provider(provider)
+                if provider is None:
+                    continue
+                if provider.get_ready():
+                    self.add_provider(provider)
+                else:
+                    provider.connect('notify::ready', self.on_provider_ready)
+
+    def on_provider_ready(self, provider, param):
+        if provider.get_ready() and provider not in self.providers:
+            self.add_provider(provider)
 
     def add_provider(self, provider):
         self.providers.append(provider)
+        self.scheduler.add_provider(provider)
         self.emit('provider-added', provider)
 
     def manually_sync(self, button):
-        #TODO: make general sync function
-        pass
+        self.scheduler.sync_now()
+
+    def on_header_hierarchy_changed(self, button, previous_toplevel):
+        # The syncs are more frequent while the window is focused
+        window = button.get_toplevel()
+        if isinstance(window, Gtk.Window) and window is not self._window:
+            self._window = window
+            window.connect('notify::is-active', self.on_window_active)
+            self.scheduler.set_focused(window.is_active())
+
+    def on_window_active(self, window, param):
+        self.scheduler.set_focused(window.is_active())
 
     def do_activate(self):
         self.accounts_manager.load()
 
     def do_deactivate(self):
-        pass
+        self.scheduler.clear()
+        self.accounts_manager.save()
 
     def do_get_header_widgets(self):
         return [self.header_button]
@@ -17,12 +17,13 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
-from gi.repository import GObject, Gtd, Gio
+from gi.repository import GObject, Gtd, Gio, GLib
 
+from todoist.files import atomic_write
 from .authentication import OAuth2
 
 from configparser import ConfigParser, ParsingError, MissingSectionHeaderError
-from contextlib import contextmanager
+from io import StringIO
 from os.path import join, dirname, expanduser
 from os import makedirs
 from uuid import uuid4
@@ -32,6 +33,8 @@ CONF_DIR = expanduser(
 )
 makedirs(CONF_DIR, exist_ok=True)
 CONF_FILE = join(CONF_DIR, 'accounts.conf')
+# Milliseconds without changes to the accounts before they are saved
+SAVE_DELAY = 500
 
 TODOIST = 'TODOIST'
 SERVICES = {
@@ -39,26 +42,30 @@ SERVICES = {
 }
 
 
-@contextmanager
-def conf_handler(filename):
+def read_conf(filename):
     config = ConfigParser()
     try:
         with open(filename) as conf_file:
             config.read_file(conf_file)
-        yield config
     except (FileNotFoundError, ParsingError, MissingSectionHeaderError):
-        with open(filename, 'w') as conf_file:
-            ConfigParser().write(conf_file)
-        yield config
-    finally:
-        with open(filename, 'w') as conf_file:
-            config.write(conf_file)
+        config = ConfigParser()
+    return config
+
+
+def write_conf(filename, config):
+    """Writes config to a temporary file renamed over filename, so that it
+    is never left half written"""
+    conf_file = StringIO()
+    config.write(conf_file)
+    atomic_write(filename, conf_file.getvalue())
 
 
 class AccountsManager(Gio.ListStore):
     """Manages the accounts stored in the configuration file
 
-    Controls the creation, modification and deletion of all acocunts"""
+    Controls the creation, modification and deletion of all acocunts.  The
+    file is read once, and the changes are kept in memory and saved when
+    there are none for a moment"""
 
     ready = GObject.Property(type=bool, default=True)
 
@@ -71,11 +78,17 @@ class AccountsManager(Gio.ListStore):
     def __init__(self):
         Gio.ListStore.__init__(self)
         self.set_ready(False)
+        self.conf = ConfigParser()
+        self._accounts = {}
+        self._uids = []
+        # Position of each account in the list, by uid
+        self._positions = {}
+        self._save_timeout = None
 
     def load(self):
-        with conf_handler(CONF_FILE) as conf:
-            for uid in conf.sections():
-                self._helper_create_account(uid, **conf[uid])
+        self.conf = read_conf(CONF_FILE)
+        for uid in self.conf.sections():
+            self._helper_create_account(uid, **self.conf[uid])
 
     def _helper_create_account(self, uid, **kwarg):
         account = Account(uid, **kwarg)
@@ -83,14 +96,35 @@ class AccountsManager(Gio.ListStore):
         account.connect('notify::service', self.on_notify_property)
         account.connect('notify::active', self.on_notify_property)
         account.connect('notify::ready', self.on_account_ready)
+        self._accounts[uid] = account
+        self._positions[uid] = len(self._uids)
+        self._uids.append(uid)
         self.append(account)
         account.load()
         return account
 
+    def get_account(self, uid):
+        return self._accounts.get(uid)
+
     def search_account(self, uid):
-        for i in range(self.get_n_items()):
-            if self.get_item(i).uid == uid:
-                return i
+        return self._positions.get(uid)
+
+    def save(self):
+        """Saves the changes not saved yet right away"""
+        if self._save_timeout is not None:
+            GLib.source_remove(self._save_timeout)
+            self._save_timeout = None
+            write_conf(CONF_FILE, self.conf)
+
+    def _helper_schedule_save(self):
+        if self._save_timeout is not None:
+            GLib.source_remove(self._save_timeout)
+        self._save_timeout = GLib.timeout_add(SAVE_DELAY, self._helper_save)
+
+    def _helper_save(self):
+        self._save_timeout = None
+        write_conf(CONF_FILE, self.conf)
+        return GLib.SOURCE_REMOVE
 
     def on_notify_property(self, account, param):
         if param.name == 'name':
@@ -99,8 +133,10 @@ class AccountsManager(Gio.ListStore):
             val = account.service if not account.service is None else ''
         elif param.name == 'active':
             val = str(int(account.active))
-        with conf_handler(CONF_FILE) as conf:
-            conf[str(account.uid)][param.name] = val
+        section = self.conf[account.uid]
+        if section.get(param.name) != val:
+            section[param.name] = val
+            self._helper_schedule_save()
 
     def on_account_ready(self, account, param):
         """Check if all accounts are ready, managuer is ready if they are"""
@@ -112,17 +148,24 @@ class AccountsManager(Gio.ListStore):
             self.set_ready(True)
 
     def create_account(self):
-        uid = uuid4()
-        with conf_handler(CONF_FILE) as config:
-            config[uid] = {}
+        uid = str(uuid4())
+        self.conf[uid] = {}
+        self._helper_schedule_save()
         return self._helper_create_account(uid)
 
     def delete_account(self, uid):
-        with conf_handler(CONF_FILE) as conf:
-            del conf[str(uid)]
         position = self.search_account(uid)
+        if position is None:
+            return None
+        del self.conf[uid]
+        self._helper_schedule_save()
+        account = self._accounts.pop(uid)
+        del self._positions[uid]
+        del self._uids[position]
+        for index in range(position, len(self._uids)):
+            self._positions[self._uids[index]] = index
         self.remove(position)
-        return self.get_item(position)
+        return account
 
 
 class Account(Gtd.Object):
@@ -20,15 +20,35 @@
 from gi.repository import Gtd, Gio, Gdk, GLib, GObject
 
 from todoist import TodoistAPI
+from todoist.changes import REMOVED, TEMP_ID
+from todoist.models import copy_data, thaw_data, paused_gc
+from todoist.dates import (parse_datetime, format_datetime,
+                           format_command_datetime, MONTHS)
 from .accounts import Account, TODOIST
+from .worker import run_in_worker, iterate_in_batches, get_session
 
 from re import match
 from datetime import datetime, timezone, timedelta
-from contextlib import contextmanager
-import locale
-
-
-TODOIST_TIME_FORMAT = "%a %d %b %Y %X %z"
+from functools import lru_cache
+from collections import OrderedDict
+from traceback import print_exception
+from threading import Lock
+from time import monotonic
+import requests
+
+
+# The only resource types shown, which are synced more often than the rest
+TODOIST_TASK_RESOURCES = ['projects', 'items']
+# Seconds without edits before they are sent, and before trying again when
+# that fails
+COMMIT_DELAY = 2
+COMMIT_RETRY_DELAY = 30
+# Seconds the cache waits for more changes before it is written, in the
+# background
+CACHE_WRITE_DELAY = 1
+# Seconds between syncs of all of the resource types, which keep the rest of
+# the data, and the sync token of the cache, up to date
+FULL_SYNC_INTERVAL = 3600
 TODOIST_COLORS = [
     "#95ef63",
     "#ff8581",
@@ -55,46 +75,81 @@ TODOIST_COLORS = [
 ]
 
 
-@contextmanager
-def set_locale(name):
-    saved = locale.setlocale(locale.LC_ALL)
-    try:
-        yield locale.setlocale(locale.LC_ALL, name)
-    finally:
-        locale.setlocale(locale.LC_ALL, saved)
+_glib_timezones = {}
+
+def get_glib_timezone(offset):
+    """Returns the GLib.TimeZone of an offset from UTC, as a timedelta,
+    which are created once"""
+    tz = _glib_timezones.get(offset)
+    if tz is None:
+        minutes = int(offset.total_seconds() // 60)
+        sign = '-' if minutes < 0 else '+'
+        minutes = abs(minutes)
+        tz = _glib_timezones.setdefault(offset, GLib.TimeZone.new(
+            '%s%02d%02d' % (sign, minutes // 60, minutes % 60)))
+    return tz
+
+def convert_from_glib_datetime(datetime_object):
+    offset = timedelta(microseconds=datetime_object.get_utc_offset())
+    return datetime(
+        datetime_object.get_year(),
+        datetime_object.get_month(),
+        datetime_object.get_day_of_month(),
+        datetime_object.get_hour(),
+        datetime_object.get_minute(),
+        datetime_object.get_second(),
+        tzinfo=timezone(offset),
+    )
 
 def convert_to_todoist_datetime(datetime_object):
-    with set_locale('C'):
-        if datetime_object is None:
-            return None
-        date = datetime(
-            year=datetime_object.get_year(),
-            month=datetime_object.get_month(),
-            day=datetime_object.get_day_of_month(),
-            hour=datetime_object.get_hour(),
-            minute=datetime_object.get_minute(),
-            second=datetime_object.get_second(),
-            microsecond=datetime_object.get_microsecond(),
-            tzinfo=timezone(
-                timedelta(microseconds=datetime_object.get_utc_offset())
-            ),
-        )
-        return date.strftime(TODOIST_TIME_FORMAT)
+    """Returns the date of a GLib.DateTime in the format of the synced
+    items"""
+    if datetime_object is None:
+        return None
+    return format_datetime(convert_from_glib_datetime(datetime_object))
+
+def convert_to_todoist_due_date(datetime_object):
+    """Returns the due_date_utc and date_string arguments of the commands
+    for a GLib.DateTime, both None to clear the date"""
+    if datetime_object is None:
+        return None, None
+    date = convert_from_glib_datetime(datetime_object)
+    return (
+        format_command_datetime(date),
+        '%d %s %d' % (date.day, MONTHS[date.month - 1], date.year),
+    )
+
+def convert_to_command_datetime(datetime_string):
+    """Returns a date of the synced items in the format of the commands"""
+    date = parse_datetime(datetime_string)
+    if date is None:
+        return None
+    return format_command_datetime(date)
 
+@lru_cache(maxsize=4096)
 def convert_from_todoist_datetime(datetime_string):
-    with set_locale('C'):
-        if datetime_string is None:
-            return None
-        date = datetime.strptime(datetime_string, TODOIST_TIME_FORMAT)
-        return GLib.DateTime(
-            tz=GLib.TimeZone(str(date.tzinfo.utc)[3:]),
-            year=date.year,
-            month=date.month,
-            day=date.day,
-            hour=date.hour,
-            minute=date.minute,
-            seconds=float(date.second),
-        )
+    # Many tasks share their due dates, and GLib.DateTime is immutable, so
+    # the conversions are memoized
+    date = parse_datetime(datetime_string)
+    if date is None:
+        return None
+    return GLib.DateTime.new(
+        get_glib_timezone(date.utcoffset()),
+        date.year,
+        date.month,
+        date.day,
+        date.hour,
+        date.minute,
+        float(date.second),
+    )
+
+def convert_to_todoist_priority(priority):
+    # Gnome Todo priorities go from 0, none, to 3, high, and Todoist ones
+    # from 1, normal, to 4, urgent
+    return min(max(priority, 0), 3) + 1
+
+def convert_from_todoist_priority(priority):
+    return max(priority - 1, 0) if priority is not None else 0
 
 def convert_to_todoist_color(color):
     color.to_color()
@@ -117,6 +172,59 @@ def convert_from_todoist_color(color_code):
     return color
 
 
+def import_properties(gobject, data, properties):
+    """Sets the properties of gobject from the Todoist fields of data that
+    changed since the last import, given as (field, property, convert)
+    tuples, notifying them all at once.  Returns whether any changed.
+
+    The tasks and lists created by Gnome Todo are not Todoist ones, and lack
+    their id property, but are tracked the same way once saved"""
+    old = getattr(gobject, 'todoist_data', {})
+    changed = [
+        (field, name, convert) for field, name, convert in properties
+        if (field not in old or old[field] != data.get(field))
+        and gobject.find_property(name) is not None
+        ]
+    if changed:
+        gobject.freeze_notify()
+        try:
+            for field, name, convert in changed:
+                value = data.get(field)
+                if convert is not None:
+                    value = convert(value)
+                gobject.set_property(name, value)
+        finally:
+            gobject.thaw_notify()
+    gobject.todoist_data = data
+    return bool(changed)
+
+
+def import_task(task, item, task_list):
+    """Sets the properties of task that changed, and returns whether any
+    did.  Moving the task to task_list is left to the provider"""
+    task.freeze_notify()
+    try:
+        moved = task.get_property('list') is not task_list
+        if moved:
+            task.set_property('list', task_list)
+        return import_properties(task, item, TodoistTask._properties) or moved
+    finally:
+        task.thaw_notify()
+
+
+def import_task_list(task_list, project):
+    """Sets the properties of task_list that changed, and returns whether
+    any did"""
+    return import_properties(task_list, project, TodoistTaskList._properties)
+
+
+def set_todoist_id(gobject, object_id):
+    """Sets the Todoist id of gobject, when a temporary one is replaced"""
+    gobject.todoist_data = dict(gobject.todoist_data, id=object_id)
+    if gobject.find_property('id') is not None:
+        gobject.set_property('id', object_id)
+
+
 def CreateProvider(account):
     if account.service == TODOIST:
         return TodoistProvider(account)
@@ -127,19 +235,22 @@ class TodoistTask(Gtd.Task):
 
     id = GObject.Property(type=int)
 
+    _properties = (
+        ('checked', 'complete', bool),
+        ('content', 'description', None),
+        ('due_date_utc', 'due-date', convert_from_todoist_datetime),
+        ('priority', 'priority', convert_from_todoist_priority),
+        ('content', 'title', None),
+        ('id', 'id', None),
+        )
+
     def __init__(self, task, task_list):
         Gtd.Task.__init__(self)
+        self.todoist_data = {}
         self.import_from_todoist(task, task_list)
 
     def import_from_todoist(self, task, task_list):
-        due_date = convert_from_todoist_datetime(task['due_date_utc'])
-        self.set_property('complete', task['checked'])
-        self.set_property('description', task['content'])
-        self.set_property('due-date', due_date)
-        self.set_property('list', task_list)
-        self.set_property('priority', task['priority'])
-        self.set_property('title', task['content'])
-        self.set_property('id', task['id'])
+        return import_task(self, task, task_list)
 
 
 class TodoistTaskList(Gtd.TaskList):
@@ -147,16 +258,26 @@ class TodoistTaskList(Gtd.TaskList):
 
     id = GObject.Property(type=int)
 
+    _properties = (
+        ('color', 'color', convert_from_todoist_color),
+        ('name', 'name', None),
+        ('id', 'id', None),
+        )
+
     def __init__(self, project, provider):
         Gtd.TaskList.__init__(self)
+        self.todoist_data = {}
+        self.set_property('is-removable', False)
+        self.set_property('provider', provider)
         self.import_from_todoist(project, provider)
 
+    @property
+    def order(self):
+        """The position of the list in Todoist"""
+        return self.todoist_data.get('item_order') or 0
+
     def import_from_todoist(self, project, provider):
-        self.set_property('color', convert_from_todoist_color(project['color']))
-        self.set_property('is-removable', False)
-        self.set_property('name', project['name'])
-        self.set_property('provider', provider)
-        self.set_property('id', project['id'])
+        return import_task_list(self, project)
 
 
 class TodoistProvider(Gtd.Object, Gtd.Provider):
@@ -198,26 +319,314 @@ class TodoistProvider(Gtd.Object, Gtd.Provider):
     def default_task_list(self):
         return self._default_task_list
 
+    @GObject.Property(type=float, default=0)
+    def progress(self):
+        return self._progress
+
     def __init__(self, account):
         Gtd.Object.__init__(self)
         self._account = account
+        self._progress = 0
         self.task_lists = {}
-        self.api = TodoistAPI(self.account.auth.access_token)
+        self.tasks = {}
+        self.api = None
+        self._changes = None
+        self._syncing = False
+        self._sync_callbacks = []
+        self._last_full_sync = None
+        # Syncs and commits of the account are sent one after the other
+        self._network_lock = Lock()
+        self._commit_timeout = None
+        self._committing = False
         self.set_ready(False)
-        self._helper_import_data()
-
-    def _helper_import_data(self):
-        for project in self.api.projects.all():
+        run_in_worker(self._helper_load_data, self._helper_import_data)
+
+    def _helper_load_data(self):
+        """Reads the cache on a worker thread, and returns the api and the
+        data of the projects and items to import.  They are shown while the
+        sync started once they are imported brings them up to date"""
+        api = TodoistAPI(self.account.auth.access_token, session=get_session(),
+                         cache_debounce=CACHE_WRITE_DELAY)
+        # From now on only the changes made to the projects and items are
+        # applied to the task lists and tasks
+        self._changes = api.changes.listen(TODOIST_TASK_RESOURCES)
+        with paused_gc():
+            with api._lock:
+                projects = [copy_data(data)
+                            for data in api['projects'].iter_data()]
+                items = [copy_data(data) for data in api['items'].iter_data()]
+            projects = [thaw_data(data) for data in projects]
+            items = [thaw_data(data) for data in items]
+        return api, ({}, projects, items, [], [])
+
+    def _helper_import_data(self, data):
+        """Builds the task lists and then the tasks on the main loop, in
+        batches that keep it responsive"""
+        self.api, delta = data
+        total = len(delta[1]) + len(delta[2]) or 1
+
+        def set_progress(done):
+            self._progress = done / total
+            self.notify('progress')
+
+        self._helper_apply_changes(
+            delta,
+            done=self._helper_import_done,
+            progress=set_progress,
+            )
+
+    def _helper_read_changes(self):
+        """Takes the changes made to the projects and items since the last
+        call, on a worker thread, and returns the renamed temporary ids, the
+        data of the projects and items added or updated, and the ids of the
+        ones removed, with the changes of the same object coalesced"""
+        temp_ids = {}
+        changes = OrderedDict()
+        for change in self._changes:
+            if change.kind == TEMP_ID:
+                temp_ids[change.old_id] = change.obj['id']
+            else:
+                key = (change.datatype, id(change.obj))
+                changes.pop(key, None)
+                changes[key] = change
+        delta = (temp_ids, [], [], [], [])
+        with self.api._lock:
+            for change in changes.values():
+                if change.kind == REMOVED:
+                    index = 3 if change.datatype == 'projects' else 4
+                    delta[index].append(change.obj['id'])
+                else:
+                    index = 1 if change.datatype == 'projects' else 2
+                    delta[index].append(copy_data(change.obj.data))
+        for index in (1, 2):
+            delta[index][:] = [thaw_data(data) for data in delta[index]]
+        return delta
+
+    def _helper_apply_changes(self, delta, done=None, progress=None):
+        """Applies the changes read by _helper_read_changes to the task lists
+        and tasks on the main loop, setting only the properties that changed.
+        The task lists come first, and then the tasks in batches, those of
+        the default list and then of the lists in the order shown first"""
+        temp_ids, projects, items, removed_projects, removed_items = delta
+        for old_id, new_id in temp_ids.items():
+            for objects in (self.task_lists, self.tasks):
+                if old_id in objects:
+                    objects[new_id] = objects.pop(old_id)
+                    set_todoist_id(objects[new_id], new_id)
+        for item_id in removed_items:
+            self._helper_remove_task(item_id)
+        for project_id in removed_projects:
+            self._helper_remove_task_list(project_id)
+        for project in projects:
+            self._helper_import_project(project)
+        items.sort(key=self._helper_item_order)
+
+        def batch_done(count):
+            if progress is not None:
+                progress(len(projects) + count)
+
+        iterate_in_batches(
+            items,
+            self._helper_import_item,
+            done=done,
+            progress=batch_done,
+            )
+
+    def _helper_item_order(self, item):
+        task_list = self.task_lists.get(item['project_id'])
+        if task_list is None:
+            return (True, 0, 0)
+        return (
+            task_list is not self._default_task_list,
+            task_list.order,
+            item.get('item_order') or 0,
+            )
+
+    def _helper_import_project(self, project):
+        task_list = self.task_lists.get(project['id'])
+        if task_list is None:
             task_list = TodoistTaskList(project, self)
             self.task_lists[task_list.id] = task_list
             self.emit('list-added', task_list)
-            if task_list.get_property('name') == 'Inbox':
-                self._default_task_list = task_list
-        for item in self.api.items.all():
-            task_list = self.task_lists[item['project_id']]
+        elif import_task_list(task_list, project):
+            self.emit('list-changed', task_list)
+        if task_list.get_property('name') == 'Inbox':
+            self._default_task_list = task_list
+
+    def _helper_import_item(self, item):
+        task_list = self.task_lists.get(item['project_id'])
+        task = self.tasks.get(item['id'])
+        if task_list is None:
+            self._helper_remove_task(item['id'])
+        elif task is None:
             task = TodoistTask(item, task_list)
+            self.tasks[task.id] = task
             task_list.save_task(task)
+        else:
+            old_list = task.get_list()
+            # The notifications of the properties changed are enough for the
+            # list to emit task-updated
+            import_task(task, item, task_list)
+            if old_list is not task_list:
+                if old_list is not None:
+                    old_list.remove_task(task)
+                task_list.save_task(task)
+
+    def _helper_remove_task(self, item_id):
+        task = self.tasks.pop(item_id, None)
+        if task is not None and task.get_list() is not None:
+            task.get_list().remove_task(task)
+
+    def _helper_remove_task_list(self, project_id):
+        task_list = self.task_lists.pop(project_id, None)
+        if task_list is None:
+            return
+        for item_id, task in list(self.tasks.items()):
+            if task.get_list() is task_list:
+                del self.tasks[item_id]
+        if task_list is self._default_task_list:
+            self._default_task_list = None
+        self.emit('list-removed', task_list)
+
+    def _helper_import_done(self):
         self.set_ready(True)
+        self.sync(error_callback=self._helper_sync_failed)
+
+    def _helper_sync_failed(self, error):
+        # Offline, the cached data is still shown
+        if not isinstance(error, (requests.exceptions.RequestException,
+                                  ValueError)):
+            print_exception(type(error), error, error.__traceback__)
+
+    def _helper_schedule_commit(self, delay=COMMIT_DELAY):
+        """Sends the edits once there are none for delay seconds"""
+        if self._commit_timeout is not None:
+            GLib.source_remove(self._commit_timeout)
+        self._commit_timeout = GLib.timeout_add_seconds(
+            delay, self._helper_commit)
+
+    def _helper_commit(self):
+        self._commit_timeout = None
+        if self._committing:
+            # The edits made since that commit started are sent after it
+            self._helper_schedule_commit()
+        else:
+            self._committing = True
+            run_in_worker(
+                self._helper_run_commit,
+                self._helper_commit_done,
+                self._helper_commit_failed,
+                )
+        return GLib.SOURCE_REMOVE
+
+    def _helper_run_commit(self):
+        with self._network_lock:
+            self.api.commit(raise_on_error=False)
+        return self._helper_read_changes()
+
+    def _helper_commit_done(self, delta):
+        # The temporary ids of the new tasks and lists are replaced here
+        self._committing = False
+        self._helper_apply_changes(delta)
+
+    def _helper_commit_failed(self, error):
+        # The commands stay in the queue, and its journal, until sent
+        self._committing = False
+        if not isinstance(error, (requests.exceptions.RequestException,
+                                  ValueError)):
+            print_exception(type(error), error, error.__traceback__)
+        self._helper_schedule_commit(COMMIT_RETRY_DELAY)
+
+    def _helper_task_fields(self, task):
+        """Returns the arguments of the commands for the fields of task"""
+        due_date_utc, date_string = convert_to_todoist_due_date(
+            task.get_due_date())
+        return {
+            'content': task.get_title(),
+            'priority': convert_to_todoist_priority(task.get_priority()),
+            'due_date_utc': due_date_utc,
+            'date_string': date_string,
+            }
+
+    def _helper_item_fields(self, item):
+        """Returns the fields of item in the format of the commands, but for
+        date_string, which is only sent along with due_date_utc"""
+        return {
+            'content': item['content'],
+            'priority': item.data.get('priority'),
+            'due_date_utc': convert_to_command_datetime(
+                item.data.get('due_date_utc')),
+            }
+
+    def _helper_set_local_due_date(self, item, task):
+        """Keeps the due date of item in the format of the synced items,
+        instead of the one of the commands, until the next sync"""
+        item.data['due_date_utc'] = convert_to_todoist_datetime(
+            task.get_due_date())
+
+    def _helper_project_fields(self, task_list):
+        return {
+            'name': task_list.get_name(),
+            'color': convert_to_todoist_color(task_list.get_color()),
+            }
+
+    @property
+    def metrics(self):
+        """The measures of the requests and syncs made for this account"""
+        return self.api.metrics if self.api is not None else None
+
+    def sync(self, full=False, callback=None, error_callback=None):
+        """Syncs projects and items, or all of the data if full is True, on
+        a worker thread, and then applies the changes to the task lists and
+        tasks, calling callback with the response when done, or
+        error_callback with the exception raised if it fails.  The syncs are
+        incremental, from the sync token of the cache, if there is one.
+        The first sync, and one every FULL_SYNC_INTERVAL seconds, are full.
+
+        Only one sync of the account runs at a time: asking for a sync while
+        one is running merges into it, with the callbacks called at its end"""
+        self._sync_callbacks.append((callback, error_callback))
+        if self._syncing:
+            return
+        self._syncing = True
+        if (self._last_full_sync is None or
+                monotonic() - self._last_full_sync >= FULL_SYNC_INTERVAL):
+            full = True
+        resource_types = None if full else TODOIST_TASK_RESOURCES
+
+        def sync():
+            with self._network_lock:
+                # The edits not sent yet go first, so that the sync doesn't
+                # bring back the old values
+                if self.api.queue:
+                    self.api.commit(raise_on_error=False)
+                response = self.api.sync(resource_types=resource_types)
+            return response, self._helper_read_changes()
+
+        run_in_worker(
+            sync,
+            lambda result: self._helper_sync_done(result, None, full),
+            lambda error: self._helper_sync_done(None, error, full),
+            )
+
+    def _helper_sync_done(self, result, error, full=False):
+        callbacks, self._sync_callbacks = self._sync_callbacks, []
+        self._syncing = False
+        if error is None:
+            if full:
+                self._last_full_sync = monotonic()
+            response, delta = result
+            self._helper_apply_changes(delta)
+            for callback, error_callback in callbacks:
+                if callback is not None:
+                    callback(response)
+            return
+        error_callbacks = [error_callback for callback, error_callback
+                           in callbacks if error_callback is not None]
+        for error_callback in error_callbacks:
+            error_callback(error)
+        if not error_callbacks:
+            print_exception(type(error), error, error.__traceback__)
 
     def do_get_description(self):
         return self.get_property('description')
@@ -235,44 +644,90 @@ class TodoistProvider(Gtd.Object, Gtd.Provider):
         return self.get_property('name')
 
     def do_create_task(self, task):
-        pass
+        task_list = task.get_list()
+        fields = {key: value for key, value
+                  in self._helper_task_fields(task).items()
+                  if value is not None}
+        with self.api._lock:
+            item = self.api.items.add(
+                project_id=task_list.todoist_data['id'], **fields)
+            self._helper_set_local_due_date(item, task)
+            if task.get_complete():
+                item.complete()
+            task.todoist_data = item.data.to_dict()
+        self.tasks[item['id']] = task
+        self._helper_schedule_commit()
 
     def do_update_task(self, task):
-        pass
+        item_id = task.todoist_data['id']
+        task_list = task.get_list()
+        fields = self._helper_task_fields(task)
+        with self.api._lock:
+            item = self.api.items.get_by_id(item_id, only_local=True)
+            if item is None:
+                return
+            current = self._helper_item_fields(item)
+            changed = {key: fields[key] for key in current
+                       if fields[key] != current[key]}
+            if 'due_date_utc' in changed:
+                changed['date_string'] = fields['date_string']
+            if changed:
+                item.update(**changed)
+                self._helper_set_local_due_date(item, task)
+            project_id = task_list.todoist_data['id']
+            if item['project_id'] != project_id:
+                item.move(project_id)
+            if task.get_complete() != bool(item['checked']):
+                if task.get_complete():
+                    item.complete()
+                else:
+                    item.uncomplete()
+            task.todoist_data = item.data.to_dict()
+        self._helper_schedule_commit()
 
     def do_remove_task(self, task):
-        pass
+        item_id = task.todoist_data['id']
+        with self.api._lock:
+            item = self.api.items.get_by_id(item_id, only_local=True)
+            if item is not None:
+                item.delete()
+        self._helper_remove_task(item_id)
+        self._helper_schedule_commit()
 
     def do_create_task_list(self, task_list):
-        print(task_list)
-        info = {
-            'name':task_list.get_name(),
-            'color':convert_to_todoist_color(task_list.get_color()),
-        }
-        project = self.api.projects.add(**info)
-        self.api.commit()
-        task_list = TodoistTaskList(project, self)
-        self.task_lists.append(task_list)
-        self.emit('list-added', self, task_list, None)
+        with self.api._lock:
+            project = self.api.projects.add(
+                **self._helper_project_fields(task_list))
+            task_list.todoist_data = project.data.to_dict()
+        if task_list.get_provider() is None:
+            task_list.set_provider(self)
+        self.task_lists[project['id']] = task_list
+        self.emit('list-added', task_list)
+        self._helper_schedule_commit()
 
     def do_update_task_list(self, task_list):
-        print(task_list)
-        project = self.api.projects.get_by_id(task_list.get_id())
-        info = {
-            'name':task_list.get_name(),
-            'color':convert_to_todoist_color(task_list.get_color()),
-        }
-        project.update(**info)
-        self.api.commit()
-        self.emit('list-changed', self, task_list, None)
+        project_id = task_list.todoist_data['id']
+        fields = self._helper_project_fields(task_list)
+        with self.api._lock:
+            project = self.api.projects.get_by_id(project_id, only_local=True)
+            if project is None:
+                return
+            fields = {key: value for key, value in fields.items()
+                      if project.data.get(key) != value}
+            if fields:
+                project.update(**fields)
+            task_list.todoist_data = project.data.to_dict()
+        self.emit('list-changed', task_list)
+        self._helper_schedule_commit()
 
     def do_remove_task_list(self, task_list):
-        print(task_list)
-        project = self.api.projects.get_by_id(task_list.get_id())
-        project.delete()
-        self.api.commit()
-        self.task_lists.remove(task_list)
-        self.emit('list-removed', self, task_list, None)
+        project_id = task_list.todoist_data['id']
+        with self.api._lock:
+            project = self.api.projects.get_by_id(project_id, only_local=True)
+            if project is not None:
+                project.delete()
+        self._helper_remove_task_list(project_id)
+        self._helper_schedule_commit()
 
     def do_get_task_lists(self):
         return list(self.task_lists.values())
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+
+# scheduler.py
+#
+# Copyright (C) 2016 Wolfang Torres <wolfang.torres@gmail.com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from gi.repository import Gio, GLib
+
+from .providers import TODOIST_TASK_RESOURCES
+
+from traceback import print_exception
+import requests
+
+
+# Seconds between the syncs of an account while the window is focused and
+# changes are coming, while it is not, and at most, when nothing changes or
+# the syncs fail
+ACTIVE_INTERVAL = 30
+IDLE_INTERVAL = 300
+MAX_INTERVAL = 1800
+
+
+class SyncScheduler(object):
+    """Syncs the providers periodically: often while the window is focused
+    and changes are coming, and less and less while nothing changes or the
+    syncs fail.  The syncs are suspended while offline"""
+
+    def __init__(self):
+        self.focused = True
+        self._intervals = {}
+        self._timeouts = {}
+        self._syncing = set()
+        self.network_monitor = Gio.NetworkMonitor.get_default()
+        self.network_monitor.connect(
+            'network-changed',
+            self.on_network_changed,
+            )
+
+    @property
+    def online(self):
+        return self.network_monitor.get_network_available()
+
+    def add_provider(self, provider):
+        self._intervals[provider] = self._helper_base_interval()
+        self._helper_schedule(provider)
+
+    def remove_provider(self, provider):
+        self._helper_cancel(provider)
+        self._intervals.pop(provider, None)
+        self._syncing.discard(provider)
+
+    def clear(self):
+        for provider in list(self._intervals):
+            self.remove_provider(provider)
+
+    def sync_now(self):
+        """Syncs all of the providers right away, back at the shortest
+        interval.  The syncs already running are not repeated"""
+        for provider in self._intervals:
+            self._intervals[provider] = self._helper_base_interval()
+            self._helper_sync(provider)
+
+    def set_focused(self, focused):
+        self.focused = focused
+        base = self._helper_base_interval()
+        for provider, interval in list(self._intervals.items()):
+            interval = min(interval, base) if focused else max(interval, base)
+            if interval != self._intervals[provider]:
+                self._intervals[provider] = interval
+                if provider not in self._syncing:
+                    self._helper_schedule(provider)
+
+    def on_network_changed(self, monitor, available):
+        if available:
+            self.sync_now()
+        else:
+            for provider in self._intervals:
+                self._helper_cancel(provider)
+
+    def _helper_base_interval(self):
+        return ACTIVE_INTERVAL if self.focused else IDLE_INTERVAL
+
+    def _helper_schedule(self, provider):
+        self._helper_cancel(provider)
+        if self.online:
+            self._timeouts[provider] = GLib.timeout_add_seconds(
+                self._intervals[provider],
+                self._helper_timeout,
+                provider,
+                )
+
+    def _helper_cancel(self, provider):
+        source = self._timeouts.pop(provider, None)
+        if source is not None:
+            GLib.source_remove(source)
+
+    def _helper_timeout(self, provider):
+        del self._timeouts[provider]
+        self._helper_sync(provider)
+        return GLib.SOURCE_REMOVE
+
+    def _helper_sync(self, provider):
+        # The next sync is scheduled when this one ends
+        self._helper_cancel(provider)
+        if provider in self._syncing:
+            return
+        self._syncing.add(provider)
+        provider.sync(
+            callback=lambda response: self._helper_synced(provider, response),
+            error_callback=lambda error: self._helper_failed(provider, error),
+            )
+
+    def _helper_synced(self, provider, response):
+        if provider not in self._intervals:
+            return
+        self._syncing.discard(provider)
+        if any(response.get(resource) for resource in TODOIST_TASK_RESOURCES):
+            self._intervals[provider] = self._helper_base_interval()
+        else:
+            self._helper_back_off(provider)
+        self._helper_schedule(provider)
+
+    def _helper_failed(self, provider, error):
+        if not isinstance(error, (requests.exceptions.RequestException,
+                                  ValueError)):
+            print_exception(type(error), error, error.__traceback__)
+        if provider not in self._intervals:
+            return
+        self._syncing.discard(provider)
+        self._helper_back_off(provider)
+        self._helper_schedule(provider)
+
+    def _helper_back_off(self, provider):
+        self._intervals[provider] = min(
+            max(self._intervals[provider] * 2, self._helper_base_interval()),
+            MAX_INTERVAL,
+            )
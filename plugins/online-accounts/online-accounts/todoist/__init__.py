@@ -1 +1,10 @@
-from .api import TodoistAPI
+def __getattr__(name):
+    # The clients are imported when first used, so that the modules of the
+    # package that don't need them, like files, load without them
+    if name == 'TodoistAPI':
+        from .api import TodoistAPI
+        return TodoistAPI
+    if name == 'AsyncTodoistAPI':
+        from .async_api import AsyncTodoistAPI
+        return AsyncTodoistAPI
+    raise AttributeError('module %r has no attribute %r' % (__name__, name))
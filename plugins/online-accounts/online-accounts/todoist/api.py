@@ -1,11 +1,26 @@
 import os
+import copy
 import uuid
 import json
+import time
 import requests
 import datetime
 import functools
+import contextlib
+import threading
 
 from todoist import models
+from todoist.models import copy_data, thaw_data, paused_gc
+from todoist.changes import (ChangeFeed, Change, ADDED, UPDATED, REMOVED,
+                             TEMP_ID)
+from todoist.cache import open_cache, CacheFlusher, OBJECT_TYPES, VALUE_TYPES
+from todoist.journal import CommandJournal, CommandQueue
+from todoist.metrics import Metrics, SIZE_BUCKETS
+from todoist.optimizer import optimize, iter_scalars, split_commands, replace_ids
+from todoist.query import QueryEngine, QueryError
+from todoist.store import ObjectStore, collaborator_state_key
+from todoist.stream import iter_members
+from todoist.transport import HTTPTransport
 from todoist.managers.biz_invitations import BizInvitationsManager
 from todoist.managers.filters import FiltersManager
 from todoist.managers.invitations import InvitationsManager
@@ -31,6 +46,36 @@ class SyncError(Exception):
     pass
 
 
+# Maximum number of commands the server accepts in a single request.
+COMMANDS_PER_REQUEST = 100
+
+
+# Number of objects merged or copied at a time while holding the lock, so that
+# other threads using the local state only wait for a chunk of a large sync.
+STATE_CHUNK_SIZE = 1000
+
+
+# Resource types that can be asked for separately in a sync.
+RESOURCE_TYPES = ('collaborators', 'day_orders', 'filters', 'items', 'labels',
+                  'live_notifications', 'locations', 'notes',
+                  'notification_settings', 'projects', 'reminders', 'user')
+
+
+# Types of objects that are kept in the local state, and their models.
+RESOURCE_MODELS = [
+    ('collaborators', models.Collaborator),
+    ('collaborator_states', models.CollaboratorState),
+    ('filters', models.Filter),
+    ('items', models.Item),
+    ('labels', models.Label),
+    ('live_notifications', models.LiveNotification),
+    ('notes', models.Note),
+    ('project_notes', models.ProjectNote),
+    ('projects', models.Project),
+    ('reminders', models.Reminder),
+]
+
+
 class TodoistAPI(object):
     """
     Implements the API that makes it possible to interact with a Todoist user
@@ -50,13 +95,22 @@ class TodoistAPI(object):
                  token='',
                  api_endpoint='https://todoist.com',
                  session=None,
-                 cache='~/.todoist-sync/'):
+                 cache='~/.todoist-sync/',
+                 cache_backend='json',
+                 cache_debounce=None,
+                 lazy_load=False,
+                 transport=None):
         self.api_endpoint = api_endpoint
+        self._lock = threading.RLock()  # Guards the state against the flusher
+        self.changes = ChangeFeed()  # Publishes the changes made by syncs
+        self.metrics = Metrics()  # Measures of the requests, syncs and cache
         self.reset_state()
         self.token = token  # User's API token
         self.temp_ids = {}  # Mapping of temporary ids to real ids
-        self.queue = []  # Requests to be sent are appended here
-        self.session = session or requests.Session()  # Session instance for requests
+        self.queue = CommandQueue()  # Requests to be sent are appended here
+        self.transport = transport or HTTPTransport(  # Sends requests
+            session, metrics=self.metrics)
+        self.session = getattr(self.transport, 'session', None)  # Session instance for requests
 
         # managers
         self.projects = ProjectsManager(self)
@@ -81,32 +135,46 @@ class TodoistAPI(object):
         self.templates = TemplatesManager(self)
         self.backups = BackupsManager(self)
 
+        self.metrics.gauge('queue_depth', lambda: len(self.queue))
+        self.cache_backend = cache_backend  # 'json' or 'sqlite'
+        self.lazy_load = lazy_load  # Build cached models only when used
+        self._item_index = None  # Indexes used to evaluate queries locally
+        self._cache = None
+        self._flusher = None
         if cache:  # Read and write user state on local disk cache
             self.cache = os.path.expanduser(cache)
             self._read_cache()
+            self._read_journal()
+            if cache_debounce is not None:  # Write the cache in background
+                self._flusher = CacheFlusher(self._write_cache, cache_debounce)
         else:
             self.cache = None
 
     def reset_state(self):
-        self.sync_token = '*'
+        self.sync_token = '*'  # Token valid for all of the resource types
+        self.sync_tokens = {}  # Newer tokens of the types synced on their own
+        self._sync_serial = 0  # Number of the sync each token comes from
+        self._dirty_values = set()  # Plain values changed since last write
         self.state = {  # Local copy of all of the user's objects
-            'collaborator_states': [],
-            'collaborators': [],
+            'collaborator_states': ObjectStore(key=collaborator_state_key),
+            'collaborators': ObjectStore(),
             'day_orders': {},
             'day_orders_timestamp': '',
-            'filters': [],
-            'items': [],
-            'labels': [],
-            'live_notifications': [],
+            'filters': ObjectStore(),
+            'items': ObjectStore(),
+            'labels': ObjectStore(),
+            'live_notifications': ObjectStore(),
             'live_notifications_last_read_id': -1,
             'locations': [],
-            'notes': [],
-            'project_notes': [],
-            'projects': [],
-            'reminders': [],
+            'notes': ObjectStore(),
+            'project_notes': ObjectStore(),
+            'projects': ObjectStore(),
+            'reminders': ObjectStore(),
             'settings_notifications': {},
             'user': {},
         }
+        for datatype, model in RESOURCE_MODELS:
+            self.state[datatype].factory = functools.partial(model, api=self)
 
     def __getitem__(self, key):
         return self.state[key]
@@ -120,15 +188,40 @@ class TodoistAPI(object):
     def _update_state(self, syncdata):
         """
         Updates the local state, with the data returned by the server after a
-        sync.
+        sync.  The objects are merged in chunks of STATE_CHUNK_SIZE, holding
+        the lock for each chunk only.
+        """
+        with self._merging():
+            with self._lock:
+                self._merge_state({key: value for key, value in syncdata.items()
+                                   if key not in OBJECT_TYPES})
+            for datatype, model in RESOURCE_MODELS:
+                self._merge_objects(datatype, syncdata.get(datatype, ()))
+
+    @contextlib.contextmanager
+    def _merging(self):
+        """
+        Times the merge of a sync into the local state, which runs with the
+        garbage collector paused, as it creates many objects.
+        """
+        with self.metrics.time('update_state'), paused_gc():
+            yield
+
+    def _merge_objects(self, datatype, objects):
+        """
+        Merges objects of a type into the local state, in chunks of
+        STATE_CHUNK_SIZE, holding the lock for each chunk only.
         """
-        # Check sync token first
-        if 'sync_token' in syncdata:
-            self.sync_token = syncdata['sync_token']
+        for start in range(0, len(objects), STATE_CHUNK_SIZE):
+            with self._lock:
+                self._merge_state({
+                    datatype: objects[start:start + STATE_CHUNK_SIZE]})
 
+    def _merge_state(self, syncdata):
         # It is straightforward to update these type of data, since it is
         # enough to just see if they are present in the sync data, and then
         # either replace the local values or update them.
+        self._dirty_values.update(key for key in VALUE_TYPES if key in syncdata)
         if 'day_orders' in syncdata:
             self.state['day_orders'].update(syncdata['day_orders'])
         if 'day_orders_timestamp' in syncdata:
@@ -146,21 +239,10 @@ class TodoistAPI(object):
         # necessary to find out whether an object in the sync data is new,
         # updates an existing object, or marks an object to be deleted.  But
         # the same procedure takes place for each of these types of data.
-        resp_models_mapping = [
-            ('collaborator', models.Collaborator),
-            ('collaborator_states', models.CollaboratorState),
-            ('filters', models.Filter),
-            ('items', models.Item),
-            ('labels', models.Label),
-            ('live_notifications', models.LiveNotification),
-            ('notes', models.Note),
-            ('project_notes', models.ProjectNote),
-            ('projects', models.Project),
-            ('reminders', models.Reminder),
-        ]
-        for datatype, model in resp_models_mapping:
+        for datatype, model in RESOURCE_MODELS:
             if datatype not in syncdata:
                 continue
+            self.metrics.count('merged.' + datatype, len(syncdata[datatype]))
 
             # Process each object of this specific type in the sync data.
             for remoteobj in syncdata[datatype]:
@@ -173,9 +255,17 @@ class TodoistAPI(object):
                     # remove it.
                     is_deleted = remoteobj.get('is_deleted', 0)
                     if is_deleted == 0 or is_deleted is False:
-                        localobj.data.update(remoteobj)
+                        fields = [key for key, value in remoteobj.items()
+                                  if localobj.data.get(key, _missing) != value]
+                        if fields:
+                            localobj.data.update(remoteobj)
+                            self.state[datatype].touch(localobj)
+                            self.changes.publish(Change(UPDATED, datatype,
+                                                        localobj, fields))
                     else:
                         self.state[datatype].remove(localobj)
+                        self.changes.publish(Change(REMOVED, datatype,
+                                                    localobj))
                 else:
                     # If not, then the object is new and it should be added,
                     # unless it is marked as to be deleted (in which case it's
@@ -184,37 +274,190 @@ class TodoistAPI(object):
                     if is_deleted == 0 or is_deleted is False:
                         newobj = model(remoteobj, self)
                         self.state[datatype].append(newobj)
+                        self.changes.publish(Change(ADDED, datatype, newobj))
 
     def _read_cache(self):
         if not self.cache:
             return
 
+        self._cache = open_cache(self.cache_backend, self.cache, self.token)
         try:
-            os.makedirs(self.cache)
-        except OSError:
-            if not os.path.isdir(self.cache):
-                raise
-
-        try:
-            with open(self.cache + self.token + '.json') as f:
-                state = f.read()
-            state = json.loads(state)
-            self._update_state(state)
-
-            with open(self.cache + self.token + '.sync') as f:
-                sync_token = f.read()
+            with self.metrics.time('cache.read'):
+                state, sync_token, sync_tokens = self._cache.read()
+            if self.lazy_load:
+                self._load_state(state)
+            else:
+                self._update_state(state)
             self.sync_token = sync_token
+            if sync_tokens:
+                self._sync_serial = sync_tokens['serial']
+                self.sync_tokens = {
+                    resource_type: tuple(token) for resource_type, token
+                    in sync_tokens['types'].items()}
         except:
             return
+        finally:
+            # What was just read is already in the cache, unless it has to be
+            # converted to the current format.
+            if not getattr(self._cache, 'legacy', False):
+                self._pop_changes()
+
+    def _read_journal(self):
+        """
+        Puts back in the queue the commands that were not committed before
+        the last exit, and journals the new ones.  They keep their uuids, so
+        the server ignores the ones that it had already processed.  Queueing
+        a command also requests a write of the cache, so that the local
+        objects it changed are found there along with it.
+        """
+        journal = CommandJournal(
+            os.path.join(self.cache, self.token + '.journal'),
+            default=json_default)
+        self.queue = CommandQueue(journal.read(), journal,
+                                  on_append=self._request_cache_write)
+
+    def _load_state(self, state):
+        """
+        Loads the cached objects as raw records, whose models are built only
+        when they are used, and the plain values as usual.
+        """
+        with self._lock:
+            for datatype in OBJECT_TYPES:
+                self.state[datatype].load(state.pop(datatype, []))
+            self._merge_state(state)
 
     def _write_cache(self):
-        if not self.cache:
-            return
-        result = json.dumps(self.state, indent=2, sort_keys=True, default=state_default)
-        with open(self.cache + self.token + '.json', 'w') as f:
-            f.write(result)
-        with open(self.cache + self.token + '.sync', 'w') as f:
-            f.write(self.sync_token)
+        """
+        Writes the changes made to the local state to the cache.  A snapshot
+        is taken while holding the lock, so that this can safely run in the
+        background while the state is being updated.  The types rewritten
+        whole are copied in chunks, holding the lock for each chunk only: the
+        objects changed in between are written again by the next write.
+
+        If the write fails, the changes are recorded again, to be written the
+        next time.
+        """
+        with paused_gc():
+            with self._lock:
+                changes = self._pop_changes()
+                if not self.cache or self._cache is None:
+                    return
+                popped = dict(changes)
+                state, rewritten = self._snapshot(changes)
+                sync_token = self.sync_token
+                sync_tokens = {'serial': self._sync_serial,
+                               'types': dict(self.sync_tokens)}
+            for datatype, data in rewritten.items():
+                state[datatype] = copies = []
+                for start in range(0, len(data), STATE_CHUNK_SIZE):
+                    with self._lock:
+                        copies.extend(map(
+                            copy_data, data[start:start + STATE_CHUNK_SIZE]))
+            self._thaw_snapshot(state, changes)
+        try:
+            with self.metrics.time('cache.write'):
+                self._cache.write(state, sync_token, changes,
+                                  default=json_default, sync_tokens=sync_tokens)
+        except:
+            self._restore_changes(popped)
+            raise
+
+    def _snapshot(self, changes):
+        """
+        Copies the plain values of the changed types of the local state, and
+        replaces the changed objects with copies of their data.  Returns them
+        along with the data of all the objects of the types that the cache
+        rewrites whole, to be copied a chunk at a time.  The copies of the
+        objects are the cheap ones of copy_data(), turned into dicts by
+        _thaw_snapshot() once the lock is released.
+        """
+        state = {}
+        rewritten = {}
+        for datatype, (changed, removed) in changes.items():
+            value = self.state[datatype]
+            if isinstance(value, ObjectStore):
+                if self._cache.rewrites_types:
+                    rewritten[datatype] = list(value.iter_data())
+                changes[datatype] = ([copy_data(obj.data) for obj in changed],
+                                     removed)
+            else:
+                state[datatype] = copy.copy(value)
+        return state, rewritten
+
+    def _thaw_snapshot(self, state, changes):
+        for datatype, (changed, removed) in changes.items():
+            if isinstance(self.state[datatype], ObjectStore):
+                if datatype in state:
+                    state[datatype] = [thaw_data(data)
+                                       for data in state[datatype]]
+                changes[datatype] = ([thaw_data(data) for data in changed],
+                                     removed)
+
+    def _request_cache_write(self):
+        if self._flusher is not None:
+            self._flusher.schedule()
+        else:
+            self._write_cache()
+
+    def flush(self):
+        """
+        Writes to the cache any change still waiting for the background
+        flusher.
+        """
+        if self._flusher is not None:
+            self._flusher.flush()
+
+    def close(self):
+        """
+        Flushes and closes the cache, writing the changes not written yet.
+        """
+        if self._flusher is not None:
+            self._flusher.close()
+            self._flusher = None
+        if self._cache is not None and self._has_changes():
+            self._write_cache()
+        if self._cache is not None:
+            self._cache.close()
+            self._cache = None
+        if self.queue.journal is not None:
+            self.queue.journal.close()
+
+    def _has_changes(self):
+        """
+        Returns whether the local state changed since the last write.
+        """
+        with self._lock:
+            return bool(self._dirty_values) or any(
+                value.dirty for value in self.state.values()
+                if isinstance(value, ObjectStore))
+
+    def _pop_changes(self):
+        """
+        Returns the changes made to the local state since the last call, as a
+        mapping from type to a tuple of the objects changed and the keys
+        removed.  Plain values only appear under their type when changed.
+        """
+        changes = {}
+        for datatype, value in self.state.items():
+            if isinstance(value, ObjectStore):
+                if value.dirty:
+                    changes[datatype] = value.pop_changes()
+            elif datatype in self._dirty_values:
+                changes[datatype] = ([], [])
+        self._dirty_values.clear()
+        return changes
+
+    def _restore_changes(self, changes):
+        """
+        Records again changes returned by _pop_changes() that were not saved.
+        """
+        with self._lock:
+            for datatype, (changed, removed) in changes.items():
+                value = self.state[datatype]
+                if isinstance(value, ObjectStore):
+                    value.restore_changes(changed, removed)
+                else:
+                    self._dirty_values.add(datatype)
 
     def _find_object(self, objtype, obj):
         """
@@ -222,28 +465,14 @@ class TodoistAPI(object):
         object, and then on its primary key is.  If the object is found it is
         returned, and if not, then None is returned.
         """
-        if objtype == 'collaborators':
-            return self.collaborators.get_by_id(obj['id'])
-        elif objtype == 'collaborator_states':
-            return self.collaborator_states.get_by_ids(obj['project_id'], obj['user_id'])
-        elif objtype == 'filters':
-            return self.filters.get_by_id(obj['id'], only_local=True)
-        elif objtype == 'items':
-            return self.items.get_by_id(obj['id'], only_local=True)
-        elif objtype == 'labels':
-            return self.labels.get_by_id(obj['id'], only_local=True)
-        elif objtype == 'live_notifications':
-            return self.live_notifications.get_by_id(obj['id'])
-        elif objtype == 'notes':
-            return self.notes.get_by_id(obj['id'], only_local=True)
-        elif objtype == 'project_notes':
-            return self.project_notes.get_by_id(obj['id'], only_local=True)
-        elif objtype == 'projects':
-            return self.projects.get_by_id(obj['id'], only_local=True)
-        elif objtype == 'reminders':
-            return self.reminders.get_by_id(obj['id'], only_local=True)
-        else:
+        store = self.state.get(objtype)
+        if not isinstance(store, ObjectStore):
             return None
+        try:
+            key = store.key(obj)
+        except KeyError:
+            return None
+        return store.get(key)
 
     def _replace_temp_id(self, temp_id, new_id):
         """
@@ -255,41 +484,66 @@ class TodoistAPI(object):
         # replaced by a real one.
         for datatype in ['filters', 'items', 'labels', 'notes', 'project_notes',
                          'projects', 'reminders']:
-            for obj in self.state[datatype]:
-                if obj.temp_id == temp_id:
-                    obj['id'] = new_id
-                    return True
+            store = self.state[datatype]
+            obj = store.get_by_temp_id(temp_id)
+            if obj is not None:
+                old_id = obj['id']
+                obj['id'] = new_id
+                # The server's copy of the object may have been merged first,
+                # as happens with streamed syncs, in which case it is merged
+                # into the local one, that callers may hold.
+                existing = store.get(new_id)
+                if existing is not None and existing is not obj:
+                    obj.data.update(existing.data)
+                    store.remove(existing)
+                store.reindex(obj, old_id)
+                self.changes.publish(Change(TEMP_ID, datatype, obj,
+                                            old_id=old_id))
+                return True
         return False
 
-    def _get(self, call, url=None, **kwargs):
+    def _prune_temp_ids(self):
+        """
+        Forgets the temporary id mappings that no queued command refers to
+        anymore.  The local objects keep their temp_id after it has been
+        replaced, so they can still be looked up by it.
+        """
+        if not self.temp_ids:
+            return
+        referenced = set()
+        for cmd in self.queue:
+            referenced.update(iter_scalars(cmd))
+        for temp_id in list(self.temp_ids):
+            if temp_id not in referenced:
+                del self.temp_ids[temp_id]
+
+    def _get(self, call, url=None, then=None, **kwargs):
         """
         Sends an HTTP GET request to the specified URL, and returns the JSON
-        object received (if any), or whatever answer it got otherwise.
+        object received (if any), or whatever answer it got otherwise.  If
+        then is given, it is called with the answer, and what it returns is
+        returned instead.
         """
         if not url:
             url = self.get_api_url()
 
-        response = self.session.get(url + call, **kwargs)
+        with self.metrics.time('get:' + call):
+            result = self.transport.request('get', url + call, **kwargs)
+        return then(result) if then is not None else result
 
-        try:
-            return response.json()
-        except ValueError:
-            return response.text
-
-    def _post(self, call, url=None, **kwargs):
+    def _post(self, call, url=None, then=None, **kwargs):
         """
         Sends an HTTP POST request to the specified URL, and returns the JSON
-        object received (if any), or whatever answer it got otherwise.
+        object received (if any), or whatever answer it got otherwise.  If
+        then is given, it is called with the answer, and what it returns is
+        returned instead.
         """
         if not url:
             url = self.get_api_url()
 
-        response = self.session.post(url + call, **kwargs)
-
-        try:
-            return response.json()
-        except ValueError:
-            return response.text
+        with self.metrics.time('post:' + call):
+            result = self.transport.request('post', url + call, **kwargs)
+        return then(result) if then is not None else result
 
     # Sync
     def generate_uuid(self):
@@ -298,57 +552,278 @@ class TodoistAPI(object):
         """
         return str(uuid.uuid1())
 
-    def sync(self, commands=None):
+    def sync(self, commands=None, resource_types=None, stream=False):
         """
         Sends to the server the changes that were made locally, and also
         fetches the latest updated data from the server.
+
+        resource_types restricts the data fetched to the given types (see
+        RESOURCE_TYPES), so that frequent syncs of a few types stay cheap.  A
+        sync token is kept for each type synced on its own, and the request
+        uses the oldest one of the types asked for, so that no change is
+        missed.
+
+        With stream, the response is parsed as it is received, and each
+        object merged into the local state as soon as it is read, so that the
+        whole response is never held in memory, which matters for the first
+        sync of large accounts.  The response returned then lacks the
+        objects.
+        """
+        resource_types = list(resource_types or ['all'])
+        data = self._sync_data(commands, resource_types)
+        with self.metrics.time('sync'):
+            if stream and hasattr(self.transport, 'stream'):
+                chunks = self.transport.stream(
+                    'post', self.get_api_url() + 'sync', data=data)
+                return self._apply_sync_stream(resource_types, chunks)
+            response = self._post('sync', data=data)
+            return self._apply_sync(resource_types, response, commands)
+
+    def _sync_data(self, commands, resource_types):
+        """
+        Returns the data to post for a sync.
         """
         post_data = {
             'token': self.token,
-            'sync_token': self.sync_token,
+            'sync_token': self._get_sync_token(resource_types),
             'day_orders_timestamp': self.state['day_orders_timestamp'],
-            'include_notification_settings': 1,
-            'resource_types': json_dumps(['all']),
+            'resource_types': json_dumps(resource_types),
             'commands': json_dumps(commands or []),
         }
-        response = self._post('sync', data=post_data)
-        if 'temp_id_mapping' in response:
-            for temp_id, new_id in response['temp_id_mapping'].items():
-                self.temp_ids[temp_id] = new_id
-                self._replace_temp_id(temp_id, new_id)
+        if 'all' in resource_types or 'notification_settings' in resource_types:
+            post_data['include_notification_settings'] = 1
+        return post_data
+
+    def _apply_sync(self, resource_types, response, commands=None):
+        """
+        Merges the response of a sync into the local state.  Responses that
+        are not the JSON object of a sync, like the error pages of proxies,
+        and those lacking the sync_status of the commands sent, raise a
+        SyncError before anything is merged.
+        """
+        if not isinstance(response, dict):
+            raise SyncError('response', response)
+        if commands and 'sync_status' not in response:
+            raise SyncError('sync_status', response)
+        with self._lock:
+            if 'temp_id_mapping' in response:
+                self._apply_temp_id_mapping(response['temp_id_mapping'])
         self._update_state(response)
-        self._write_cache()
+        with self._lock:
+            if 'sync_token' in response:
+                self._set_sync_token(resource_types, response['sync_token'])
+        self._request_cache_write()
+        self._prune_temp_ids()
         return response
 
-    def commit(self, raise_on_error=True):
+    def _apply_sync_stream(self, resource_types, chunks):
+        """
+        Merges the members of a streamed sync response into the local state
+        as they are parsed, the objects in chunks of STATE_CHUNK_SIZE, the
+        way _update_state() does.  The sync token is only recorded once
+        everything has been merged, and a response that is not a JSON object
+        raises a SyncError.
+        """
+        response = {}
+        datatype, objects = None, []
+        members = iter_members(chunks, split=OBJECT_TYPES)
+        with self._merging():
+            while True:
+                try:
+                    key, value = next(members)
+                except StopIteration:
+                    break
+                except ValueError as e:
+                    raise SyncError('response', str(e))
+                if key in OBJECT_TYPES:
+                    if key != datatype or len(objects) == STATE_CHUNK_SIZE:
+                        self._merge_objects(datatype, objects)
+                        datatype, objects = key, []
+                    objects.append(value)
+                    continue
+                with self._lock:
+                    if key == 'temp_id_mapping':
+                        self._apply_temp_id_mapping(value)
+                    elif key != 'sync_token':
+                        self._merge_state({key: value})
+                    response[key] = value
+            self._merge_objects(datatype, objects)
+        with self._lock:
+            if 'sync_token' in response:
+                self._set_sync_token(resource_types, response['sync_token'])
+        self._request_cache_write()
+        self._prune_temp_ids()
+        return response
+
+    def _apply_temp_id_mapping(self, temp_id_mapping):
+        for temp_id, new_id in temp_id_mapping.items():
+            self.temp_ids[temp_id] = new_id
+            self._replace_temp_id(temp_id, new_id)
+
+    def _get_sync_token(self, resource_types):
+        """
+        Returns the oldest of the sync tokens of the given resource types.
+        """
+        if 'all' in resource_types:
+            resource_types = RESOURCE_TYPES
+        default = (self._sync_serial, self.sync_token)
+        tokens = [self.sync_tokens.get(resource_type, default)
+                  for resource_type in resource_types]
+        return min(tokens)[1]
+
+    def _set_sync_token(self, resource_types, sync_token):
+        """
+        Records the token received for a sync of the given resource types.
+        sync_token is kept as the oldest token of all the types, so that it
+        can always be used to sync everything, and is the one cached.
+        """
+        serial = max([self._sync_serial] +
+                     [number for number, _ in self.sync_tokens.values()]) + 1
+        if 'all' in resource_types:
+            self.sync_tokens.clear()
+            self._sync_serial, self.sync_token = serial, sync_token
+            return
+        for resource_type in resource_types:
+            self.sync_tokens[resource_type] = (serial, sync_token)
+        if all(resource_type in self.sync_tokens
+               for resource_type in RESOURCE_TYPES):
+            self._sync_serial, self.sync_token = min(self.sync_tokens.values())
+            self.sync_tokens = {
+                resource_type: token for resource_type, token in
+                self.sync_tokens.items() if token[0] > self._sync_serial}
+
+    def commit(self, raise_on_error=True, chunk_size=COMMANDS_PER_REQUEST,
+               progress=None, retries=3, retry_backoff=1.0):
         """
         Commits all requests that are queued.  Note that, without calling this
         method none of the changes that are made to the objects are actually
         synchronized to the server, unless one of the aforementioned Sync API
         calls are called directly.
+
+        Large queues are sent in chunks of at most chunk_size commands, in
+        order, with the temporary ids already resolved replaced by the real
+        ones.  progress, if given, is called with the number of commands sent
+        and the total after each chunk.  The response of the last chunk is
+        returned, with the sync_status and temp_id_mapping of all of them.
+
+        Commands only leave the queue (and its journal) once their sync_status
+        is received, so that after a failure the queue holds exactly the ones
+        that may not have been processed.  A chunk failing on network errors
+        is sent again up to retries times, waiting retry_backoff seconds, then
+        twice as long each time; this is safe as the server ignores the
+        commands whose uuid it has already seen.  A response without a
+        sync_status, like an error page, stops the commit with a SyncError.
+        """
+        steps = self._commit_steps(raise_on_error, chunk_size, progress)
+        with self.metrics.time('commit'):
+            try:
+                chunk = next(steps)
+                while True:
+                    chunk = steps.send(self._sync_retrying(chunk, retries,
+                                                           retry_backoff))
+            except StopIteration as stop:
+                return stop.value
+
+    def _commit_steps(self, raise_on_error, chunk_size, progress):
+        """
+        Generator doing the work of commit(), except the actual syncs: it
+        yields the chunks of commands to send, and has to be sent back the
+        responses, so that it can be driven by blocking or asynchronous
+        clients alike.  It returns the merged response.
         """
         if len(self.queue) == 0:
             return
-        ret = self.sync(commands=self.queue)
-        del self.queue[:]
-        if 'sync_status' in ret:
-            if raise_on_error:
-                for k, v in ret['sync_status'].items():
-                    if v != 'ok':
-                        raise SyncError(k, v)
+        optimized = optimize(self.queue)
+        self.metrics.observe('commands_per_commit', len(optimized.commands),
+                             SIZE_BUCKETS)
+        self._remove_cancelled(optimized.cancelled)
+        self.queue.discard(optimized.dropped)
+        ret = None
+        sync_status = {}
+        temp_id_mapping = {}
+        sent = 0
+        for chunk in split_commands(optimized.commands, chunk_size):
+            if self.temp_ids:  # Resolved by previous chunks or commits
+                chunk = [dict(cmd, args=replace_ids(cmd['args'],
+                                                    self.temp_ids))
+                         for cmd in chunk]
+            ret = yield chunk
+            if not isinstance(ret, dict) or 'sync_status' not in ret:
+                # Whatever the server did with the chunk, its commands stay
+                # in the queue, and the rest aren't sent after them
+                raise SyncError('sync_status', ret)
+            status = ret['sync_status']
+            sync_status.update(status)
+            temp_id_mapping.update(ret.get('temp_id_mapping', {}))
+            self.queue.discard(uuid for cmd in chunk if cmd['uuid'] in status
+                               for uuid in optimized.covers[cmd['uuid']])
+            sent += len(chunk)
+            if progress is not None:
+                progress(sent, len(optimized.commands))
+        self._prune_temp_ids()
+        if ret is None:
+            return
+        ret = dict(ret, sync_status=sync_status,
+                   temp_id_mapping=temp_id_mapping)
+        if raise_on_error:
+            for k, v in sync_status.items():
+                if v != 'ok':
+                    raise SyncError(k, v)
         return ret
 
+    def _sync_retrying(self, commands, retries, backoff):
+        """
+        Sends commands, retrying with exponential backoff on network errors.
+        """
+        for attempt in range(retries + 1):
+            try:
+                return self.sync(commands=commands)
+            except requests.exceptions.RequestException:
+                if attempt == retries:
+                    raise
+                time.sleep(backoff * 2 ** attempt)
+
+    def _remove_cancelled(self, temp_ids):
+        """
+        Removes from the local state the objects that were added and deleted
+        before being committed, and so will never get a real id.
+        """
+        for temp_id in temp_ids:
+            for datatype in ['filters', 'items', 'labels', 'notes',
+                             'project_notes', 'projects', 'reminders']:
+                store = self.state[datatype]
+                obj = store.get_by_temp_id(temp_id)
+                if obj is not None and obj in store:
+                    store.remove(obj)
+
     # Miscellaneous
 
-    def query(self, queries, **kwargs):
+    def query(self, queries, local=True, **kwargs):
         """
         Performs date queries and other searches, and returns the results.
+
+        Unless local is False or other parameters are given, the queries are
+        evaluated against the local state, and only sent to the server when
+        they use syntax the local engine doesn't support, or when the local
+        state was never synced.
         """
+        if local and not kwargs and self._was_synced():
+            try:
+                return QueryEngine(self).run(queries)
+            except QueryError:
+                pass
         params = {'queries': json_dumps(queries),
                   'token': self.token}
         params.update(kwargs)
         return self._get('query', params=params)
 
+    def _was_synced(self):
+        """
+        Returns whether the local state was ever synced, from the server or
+        the cache.
+        """
+        return self.sync_token != '*' or bool(self.sync_tokens)
+
     def add_item(self, content, **kwargs):
         """
         Adds a new task.
@@ -369,8 +844,13 @@ class TodoistAPI(object):
         return '%s%s(%s)' % (name, unsaved, email_repr)
 
 
+_missing = object()
+
+
 def state_default(obj):
-    return obj.data
+    if isinstance(obj, ObjectStore):
+        return list(obj)
+    return thaw_data(copy_data(obj.data))
 
 
 def json_default(obj):
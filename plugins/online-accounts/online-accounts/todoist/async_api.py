@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+import asyncio
+import functools
+
+import requests
+
+from todoist.api import TodoistAPI, COMMANDS_PER_REQUEST
+from todoist.query import QueryEngine, QueryError
+
+
+class ExecutorTransport(object):
+    """
+    Wraps a blocking transport, running its requests in an executor (the
+    default one of the loop if None), so that they don't block the event
+    loop.
+
+    Asynchronous transports only need a request(method, url, **kwargs)
+    coroutine, that returns the decoded answer, so others can be plugged in,
+    like one built on an HTTP library of the loop integrated with the GLib
+    main loop.
+    """
+    def __init__(self, transport, executor=None):
+        self.transport = transport
+        self.executor = executor
+
+    async def request(self, method, url, **kwargs):
+        loop = asyncio.get_event_loop()
+        send = functools.partial(self.transport.request, method, url, **kwargs)
+        return await loop.run_in_executor(self.executor, send)
+
+
+class AsyncTodoistAPI(TodoistAPI):
+    """
+    Asynchronous version of TodoistAPI, sharing its managers, models and
+    local state.  sync(), commit(), query() and all of the manager methods
+    that talk to the server return awaitables, while the ones working on the
+    local state (like add or update) are the same.
+
+    transport can be an asynchronous transport, or a blocking one that is
+    then run in the default executor of the loop.
+    """
+    def __init__(self, token='', api_endpoint='https://todoist.com',
+                 session=None, cache='~/.todoist-sync/', transport=None,
+                 **kwargs):
+        super(AsyncTodoistAPI, self).__init__(token, api_endpoint, session,
+                                              cache, **kwargs)
+        transport = transport or self.transport
+        if not asyncio.iscoroutinefunction(transport.request):
+            transport = ExecutorTransport(transport)
+        self.transport = transport
+
+    async def _request(self, method, call, url, then, kwargs):
+        if not url:
+            url = self.get_api_url()
+        with self.metrics.time(method + ':' + call):
+            result = await self.transport.request(method, url + call,
+                                                  **kwargs)
+        return then(result) if then is not None else result
+
+    def _get(self, call, url=None, then=None, **kwargs):
+        return self._request('get', call, url, then, kwargs)
+
+    def _post(self, call, url=None, then=None, **kwargs):
+        return self._request('post', call, url, then, kwargs)
+
+    async def sync(self, commands=None, resource_types=None):
+        resource_types = list(resource_types or ['all'])
+        with self.metrics.time('sync'):
+            response = await self._post('sync', data=self._sync_data(
+                commands, resource_types))
+            return self._apply_sync(resource_types, response, commands)
+
+    async def commit(self, raise_on_error=True,
+                     chunk_size=COMMANDS_PER_REQUEST, progress=None,
+                     retries=3, retry_backoff=1.0):
+        steps = self._commit_steps(raise_on_error, chunk_size, progress)
+        with self.metrics.time('commit'):
+            try:
+                chunk = next(steps)
+                while True:
+                    response = await self._sync_retrying(chunk, retries,
+                                                         retry_backoff)
+                    chunk = steps.send(response)
+            except StopIteration as stop:
+                return stop.value
+
+    async def _sync_retrying(self, commands, retries, backoff):
+        for attempt in range(retries + 1):
+            try:
+                return await self.sync(commands=commands)
+            except requests.exceptions.RequestException:
+                if attempt == retries:
+                    raise
+                await asyncio.sleep(backoff * 2 ** attempt)
+
+    async def query(self, queries, local=True, **kwargs):
+        if local and not kwargs and self._was_synced():
+            try:
+                return QueryEngine(self).run(queries)
+            except QueryError:
+                pass
+        return await super(AsyncTodoistAPI, self).query(queries, local=False,
+                                                        **kwargs)
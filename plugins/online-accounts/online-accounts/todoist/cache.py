@@ -0,0 +1,339 @@
+# -*- coding: utf-8 -*-
+import os
+import json
+import atexit
+import sqlite3
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+
+from .files import atomic_write
+from .store import object_key, collaborator_state_key
+
+
+# Types of objects kept in the local state as lists of models, and the ones
+# kept as plain values.
+OBJECT_TYPES = ('collaborator_states', 'collaborators', 'filters', 'items',
+                'labels', 'live_notifications', 'notes', 'project_notes',
+                'projects', 'reminders')
+VALUE_TYPES = ('day_orders', 'day_orders_timestamp',
+               'live_notifications_last_read_id', 'locations',
+               'settings_notifications', 'user')
+
+# Fields that are stored in their own indexed columns by the SQLite cache, so
+# that objects can be looked up by them without loading the whole state.
+INDEXED_FIELDS = ('project_id', 'item_id')
+
+# Primary keys of the types of objects that are not identified by their id.
+KEYS = {
+    'collaborator_states': collaborator_state_key,
+}
+
+# Number of threads used to read the JSON shards.
+READ_WORKERS = 4
+
+
+class JSONCache(object):
+    """
+    Keeps the user state in a directory named after the token, with one JSON
+    shard per type of data and the sync tokens in their own file.
+
+    Only the shards of the types that changed since the last write are
+    rewritten, each one atomically, and the sync token is written last, so
+    after a crash the shards are never older than the token.
+    """
+    rewrites_types = True  # Needs the whole data of the changed types
+
+    def __init__(self, path, token):
+        self.path = path
+        self.token = token
+        self.directory = os.path.join(path, token)
+        self.legacy = False  # Whether the state was read from a single file
+        try:
+            os.makedirs(self.directory)
+        except OSError:
+            if not os.path.isdir(self.directory):
+                raise
+
+    def _shard(self, datatype):
+        return os.path.join(self.directory, datatype + '.json')
+
+    def _read_shard(self, datatype):
+        try:
+            with open(self._shard(datatype)) as f:
+                return datatype, json.loads(f.read())
+        except FileNotFoundError:
+            return datatype, None
+
+    def read(self):
+        """
+        Returns the cached state, sync token and tokens of the resource types
+        synced on their own.  The shards are read in parallel.
+        """
+        try:
+            with open(os.path.join(self.directory, 'sync')) as f:
+                sync_token, sync_tokens = decode_sync_tokens(f.read())
+        except FileNotFoundError:
+            return self._read_legacy()
+        datatypes = OBJECT_TYPES + VALUE_TYPES
+        with ThreadPoolExecutor(max_workers=READ_WORKERS) as executor:
+            shards = executor.map(self._read_shard, datatypes)
+            state = {datatype: value for datatype, value in shards
+                     if value is not None}
+        return state, sync_token, sync_tokens
+
+    def _read_legacy(self):
+        """
+        Reads the single file cache used by previous versions.  The next write
+        creates the shards and removes it.
+        """
+        with open(self.path + self.token + '.json') as f:
+            state = json.loads(f.read())
+        with open(self.path + self.token + '.sync') as f:
+            sync_token = f.read()
+        self.legacy = True
+        return state, sync_token, None
+
+    def write(self, state, sync_token, changes, default=None,
+              sync_tokens=None):
+        """
+        Rewrites the shards of the types that changed, and then the sync
+        tokens, all of them in the same file.
+        """
+        for datatype in changes:
+            result = json.dumps(state[datatype], separators=(',', ':'),
+                                sort_keys=True, default=default)
+            atomic_write(self._shard(datatype), result)
+        atomic_write(os.path.join(self.directory, 'sync'),
+                     encode_sync_tokens(sync_token, sync_tokens))
+        if self.legacy:
+            self.legacy = False
+            for suffix in ('.json', '.sync'):
+                try:
+                    os.remove(self.path + self.token + suffix)
+                except OSError:
+                    pass
+
+    def close(self):
+        pass
+
+
+class SQLiteCache(object):
+    """
+    Keeps the user state in a SQLite database, one table per type of object.
+
+    Each write only upserts the objects that changed and deletes the ones
+    that were removed, in the same transaction that stores the new sync
+    tokens, so the database never holds objects that don't match them.
+    """
+    rewrites_types = False  # Only needs the changed objects
+
+    def __init__(self, path, token):
+        self.path = path
+        self.token = token
+        self.conn = sqlite3.connect(path + token + '.db',
+                                    check_same_thread=False)
+        self._lock = threading.Lock()  # The flusher writes from its thread
+        self._create_tables()
+
+    def _create_tables(self):
+        with self.conn:
+            self.conn.execute('CREATE TABLE IF NOT EXISTS meta '
+                              '(key TEXT PRIMARY KEY, value TEXT)')
+            for datatype in OBJECT_TYPES:
+                self.conn.execute(
+                    'CREATE TABLE IF NOT EXISTS %s '
+                    '(key TEXT UNIQUE NOT NULL, project_id, item_id, '
+                    'data TEXT NOT NULL)' % datatype)
+                for field in INDEXED_FIELDS:
+                    self.conn.execute(
+                        'CREATE INDEX IF NOT EXISTS %s_%s ON %s (%s)' %
+                        (datatype, field, datatype, field))
+
+    def read(self):
+        """
+        Returns the cached state, sync token and tokens of the resource types
+        synced on their own.
+        """
+        state = {}
+        sync_token = None
+        sync_tokens = None
+        for key, value in self.conn.execute('SELECT key, value FROM meta'):
+            if key == 'sync_token':
+                sync_token = value
+            elif key == 'sync_tokens':
+                sync_tokens = json.loads(value)
+            else:
+                state[key] = json.loads(value)
+        if sync_token is None:
+            raise LookupError('No sync token in %s' % self.path)
+        for datatype in OBJECT_TYPES:
+            state[datatype] = [
+                json.loads(data) for (data,) in self.conn.execute(
+                    'SELECT data FROM %s ORDER BY rowid' % datatype)]
+        return state, sync_token, sync_tokens
+
+    def write(self, state, sync_token, changes, default=None,
+              sync_tokens=None):
+        """
+        Applies the changes made to the state since the last write, and
+        stores the sync tokens, in one transaction.
+        """
+        with self._lock, self.conn:
+            for datatype, (changed, removed) in changes.items():
+                if datatype in VALUE_TYPES:
+                    self.conn.execute(
+                        'INSERT OR REPLACE INTO meta (key, value) '
+                        'VALUES (?, ?)',
+                        (datatype, json.dumps(state[datatype])))
+                    continue
+                key = KEYS.get(datatype, object_key)
+                self.conn.executemany(
+                    'DELETE FROM %s WHERE key = ?' % datatype,
+                    [(json.dumps(key),) for key in removed])
+                self.conn.executemany(
+                    'INSERT INTO %s (key, project_id, item_id, data) '
+                    'VALUES (?, ?, ?, ?) ON CONFLICT (key) DO UPDATE SET '
+                    'project_id = excluded.project_id, '
+                    'item_id = excluded.item_id, '
+                    'data = excluded.data' % datatype,
+                    [self._row(key(data), data, default) for data in changed])
+            self.conn.executemany(
+                'INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)',
+                [('sync_token', sync_token),
+                 ('sync_tokens', json.dumps(sync_tokens))])
+
+    def _row(self, key, data, default):
+        return (json.dumps(key), data.get('project_id'), data.get('item_id'),
+                json.dumps(data, default=default))
+
+    def get(self, datatype, key):
+        """
+        Returns the data of an object by its primary key, or None.
+        """
+        with self._lock:
+            row = self.conn.execute(
+                'SELECT data FROM %s WHERE key = ?' % datatype,
+                (json.dumps(key),)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def select(self, datatype, **where):
+        """
+        Returns the data of the objects whose indexed fields match the given
+        values, in insertion order.
+        """
+        for field in where:
+            if field not in INDEXED_FIELDS:
+                raise ValueError('%s is not an indexed field' % field)
+        query = 'SELECT data FROM %s' % datatype
+        if where:
+            query += ' WHERE ' + ' AND '.join('%s = ?' % field
+                                              for field in where)
+        query += ' ORDER BY rowid'
+        with self._lock:
+            rows = self.conn.execute(query, tuple(where.values())).fetchall()
+        return [json.loads(data) for (data,) in rows]
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+
+class CacheFlusher(object):
+    """
+    Writes the cache from a background thread.  All the writes requested
+    within the debounce window (in seconds) of the first one are coalesced
+    into a single write.
+
+    Pending writes are flushed when the interpreter exits.
+    """
+    def __init__(self, write, debounce):
+        self.write = write
+        self.debounce = debounce
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()  # Keeps writes in order
+        self._timer = None
+        _flushers.add(self)
+
+    @property
+    def pending(self):
+        return self._timer is not None
+
+    def schedule(self):
+        """
+        Requests a write, which happens when the debounce window expires.
+        """
+        with self._lock:
+            if self._timer is None:
+                self._timer = threading.Timer(self.debounce, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def flush(self):
+        """
+        Performs the pending write, if any, right away.
+        """
+        with self._lock:
+            timer, self._timer = self._timer, None
+        if timer is None:
+            return
+        timer.cancel()
+        with self._write_lock:
+            self.write()
+
+    def close(self):
+        self.flush()
+        _flushers.discard(self)
+
+
+_flushers = weakref.WeakSet()
+
+
+@atexit.register
+def _flush_all():
+    for flusher in list(_flushers):
+        flusher.flush()
+
+
+def encode_sync_tokens(sync_token, sync_tokens):
+    """
+    Returns the contents of the sync file of the JSON cache: the sync token
+    alone, as in previous versions, or along with the tokens of the types
+    synced on their own.
+    """
+    if not sync_tokens:
+        return sync_token
+    return json.dumps({'sync_token': sync_token, 'sync_tokens': sync_tokens})
+
+
+def decode_sync_tokens(data):
+    """
+    Returns the sync token and the tokens of the types synced on their own
+    (or None) of the contents of a sync file.
+    """
+    try:
+        tokens = json.loads(data)
+    except ValueError:
+        return data, None
+    if not isinstance(tokens, dict):
+        return data, None
+    return tokens['sync_token'], tokens.get('sync_tokens')
+
+
+BACKENDS = {
+    'json': JSONCache,
+    'sqlite': SQLiteCache,
+}
+
+
+def open_cache(backend, path, token):
+    """
+    Creates the cache directory if needed, and returns a cache of the given
+    backend for the token.
+    """
+    try:
+        os.makedirs(path)
+    except OSError:
+        if not os.path.isdir(path):
+            raise
+    return BACKENDS[backend](path, token)
@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+import threading
+import contextlib
+from collections import deque
+
+
+# Kinds of changes.
+ADDED = 'added'
+UPDATED = 'updated'
+REMOVED = 'removed'
+TEMP_ID = 'temp_id'  # The temporary id of an object replaced by the real one
+
+
+class Change(object):
+    """
+    A change of an object of the local state: its kind, the resource type
+    and the object, along with the names of the fields that changed for
+    updates, and the temporary id that was replaced for temp_id changes.
+    """
+    __slots__ = ('kind', 'datatype', 'obj', 'fields', 'old_id')
+
+    def __init__(self, kind, datatype, obj, fields=(), old_id=None):
+        self.kind = kind
+        self.datatype = datatype
+        self.obj = obj
+        self.fields = fields
+        self.old_id = old_id
+
+    def __repr__(self):
+        return 'Change(%s, %s, %r)' % (self.kind, self.datatype, self.obj)
+
+
+class ChangeFeed(object):
+    """
+    Publishes the changes made to the local state by syncs to the callbacks
+    subscribed to them.  Callbacks are called in the thread updating the
+    state, while it is locked, so they should only record or forward the
+    changes.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = ()  # Replaced as a whole, so publish needs no lock
+
+    def subscribe(self, callback, datatypes=None):
+        """
+        Calls callback with every change of the given resource types, or of
+        all of them if None.  Returns the subscription to unsubscribe.
+        """
+        subscription = (callback, frozenset(datatypes) if datatypes else None)
+        with self._lock:
+            self._subscribers += (subscription,)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscribers = tuple(other for other in self._subscribers
+                                      if other is not subscription)
+
+    def publish(self, change):
+        for callback, datatypes in self._subscribers:
+            if datatypes is None or change.datatype in datatypes:
+                callback(change)
+
+    def listen(self, datatypes=None):
+        """
+        Returns a ChangeQueue receiving the changes of the given types.
+        """
+        return ChangeQueue(self, datatypes)
+
+    @contextlib.contextmanager
+    def collect(self, datatypes=None):
+        """
+        Context manager giving a ChangeQueue with the changes made while it is
+        active, like the ones of a sync.
+        """
+        queue = self.listen(datatypes)
+        try:
+            yield queue
+        finally:
+            queue.close()
+
+
+class ChangeQueue(object):
+    """
+    Accumulates changes until they are pulled by iterating over it, which
+    consumes them.
+    """
+    def __init__(self, feed, datatypes=None):
+        self.feed = feed
+        self._changes = deque()
+        self._subscription = feed.subscribe(self._changes.append, datatypes)
+
+    def __len__(self):
+        return len(self._changes)
+
+    def __iter__(self):
+        while True:
+            try:
+                yield self._changes.popleft()
+            except IndexError:
+                return
+
+    def close(self):
+        self.feed.unsubscribe(self._subscription)
@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+import math
+from array import array
+
+from .dates import to_timestamp
+
+
+class ItemTable(object):
+    """
+    Columnar copy of the fields of the items that are most often filtered
+    on: id, project_id, priority, checked and due date (as a timestamp, NaN
+    when the item has no due date).
+
+    Filtering runs over the columns, without touching the models or their
+    data, and returns the matching ids.
+    """
+    def __init__(self, store):
+        self.version = store.version
+        self.ids = []
+        self.project_ids = []
+        self.priorities = array('b')
+        self.checked = array('b')
+        self.due = array('d')
+        for data in store.iter_data():
+            self.ids.append(data['id'])
+            self.project_ids.append(data.get('project_id'))
+            self.priorities.append(data.get('priority') or 1)
+            self.checked.append(1 if data.get('checked') else 0)
+            try:
+                due = to_timestamp(data.get('due_date_utc'))
+            except ValueError:
+                due = None
+            self.due.append(math.nan if due is None else due)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def select(self, project_id=None, priority=None, checked=None,
+               due_before=None, due_after=None, has_due=None):
+        """
+        Returns the ids of the items matching all of the given conditions.
+        Dates are POSIX timestamps; due_before is exclusive and due_after
+        inclusive.
+        """
+        rows = range(len(self.ids))
+        if project_id is not None:
+            column = self.project_ids
+            rows = [row for row in rows if column[row] == project_id]
+        if priority is not None:
+            column = self.priorities
+            rows = [row for row in rows if column[row] == priority]
+        if checked is not None:
+            column, value = self.checked, 1 if checked else 0
+            rows = [row for row in rows if column[row] == value]
+        if has_due is not None:
+            column = self.due
+            rows = [row for row in rows
+                    if math.isnan(column[row]) != bool(has_due)]
+        if due_before is not None:
+            column = self.due
+            rows = [row for row in rows if column[row] < due_before]
+        if due_after is not None:
+            column = self.due
+            rows = [row for row in rows if column[row] >= due_after]
+        return [self.ids[row] for row in rows]
@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+import datetime
+
+
+# Dates are sent by the server in the C locale, like this:
+#   Fri 26 Sep 2014 08:25:05 +0000
+DAYS = ('Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun')
+MONTHS = ('Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep',
+          'Oct', 'Nov', 'Dec')
+MONTH_NUMBERS = {name: number for number, name in enumerate(MONTHS, 1)}
+
+_timezones = {}
+
+
+def get_timezone(offset):
+    """
+    Returns a timezone for an offset like '+0000' or '-0430'.
+    """
+    tz = _timezones.get(offset)
+    if tz is None:
+        minutes = int(offset[1:3]) * 60 + int(offset[3:5])
+        if offset[0] == '-':
+            minutes = -minutes
+        tz = datetime.timezone(datetime.timedelta(minutes=minutes))
+        _timezones[offset] = tz
+    return tz
+
+
+def parse_datetime(string):
+    """
+    Parses a date sent by the server, without depending on the locale.
+    Returns an aware datetime, or None if string is empty.
+    """
+    if not string:
+        return None
+    try:
+        _, day, month, year, time, offset = string.split()
+        hour, minute, second = time.split(':')
+        return datetime.datetime(int(year), MONTH_NUMBERS[month], int(day),
+                                 int(hour), int(minute), int(second),
+                                 tzinfo=get_timezone(offset))
+    except (KeyError, ValueError):
+        raise ValueError('Invalid Todoist date: %r' % (string,))
+
+
+def format_datetime(date):
+    """
+    Formats an aware datetime the way the server expects it.
+    """
+    offset = date.utcoffset()
+    minutes = int(offset.total_seconds() // 60) if offset else 0
+    sign = '-' if minutes < 0 else '+'
+    minutes = abs(minutes)
+    return '%s %02d %s %04d %02d:%02d:%02d %s%02d%02d' % (
+        DAYS[date.weekday()], date.day, MONTHS[date.month - 1], date.year,
+        date.hour, date.minute, date.second, sign, minutes // 60,
+        minutes % 60)
+
+
+def format_command_datetime(date):
+    """
+    Formats an aware datetime the way the commands adding and updating
+    objects take it, in UTC, like 2014-09-26T08:25.
+    """
+    return date.astimezone(datetime.timezone.utc).strftime('%Y-%m-%dT%H:%M')
+
+
+def parse_command_datetime(string):
+    """
+    Parses a date given to a command.  Returns an aware datetime, or None if
+    string is empty.
+    """
+    if not string:
+        return None
+    try:
+        return datetime.datetime.strptime(string, '%Y-%m-%dT%H:%M').replace(
+            tzinfo=datetime.timezone.utc)
+    except ValueError:
+        raise ValueError('Invalid Todoist command date: %r' % (string,))
+
+
+def to_timestamp(string):
+    """
+    Returns the POSIX timestamp of a date sent by the server, or None.
+    """
+    date = parse_datetime(string)
+    return date.timestamp() if date is not None else None
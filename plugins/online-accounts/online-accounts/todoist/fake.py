@@ -0,0 +1,229 @@
+# -*- coding: utf-8 -*-
+import copy
+import time
+import json
+import datetime
+import threading
+import itertools
+from urllib.parse import urlparse
+
+from .dates import format_datetime, parse_command_datetime
+from .optimizer import replace_ids
+
+
+# Resource type of the objects created by each type of command.
+COMMAND_TYPES = {
+    'filter': 'filters',
+    'item': 'items',
+    'label': 'labels',
+    'note': 'notes',
+    'project': 'projects',
+    'reminder': 'reminders',
+}
+
+
+class FakeTodoistServer(object):
+    """
+    In-process fake of the Todoist server, usable as the transport of the
+    API objects, to measure and tune the client without network.
+
+    It implements sync (full and incremental, by resource type, with the
+    commands adding, updating and deleting objects, and the item specific
+    ones), items/get, projects/get_data and completed/get_all, on top of its
+    own state.  Commands are only processed once per uuid, like the real
+    server does.  Every request waits latency seconds before being answered.
+    """
+    def __init__(self, latency=0):
+        self.latency = latency
+        self.user = {'id': 1, 'email': 'user@example.com',
+                     'full_name': 'Fake User', 'inbox_project': None}
+        self.objects = {datatype: {} for datatype in COMMAND_TYPES.values()}
+        self.serial = 0  # Number of the last change, used as sync token
+        self.changed = {datatype: {} for datatype in self.objects}
+        self.statuses = {}  # Status of each processed command, by uuid
+        self.requests = []  # Calls received, in order
+        self._ids = itertools.count(1000)
+        self._lock = threading.Lock()
+
+    def add(self, datatype, **fields):
+        """
+        Adds an object directly to the state of the server, and returns it.
+        """
+        with self._lock:
+            return self._store(datatype, dict(fields, id=fields.get(
+                'id', next(self._ids))))
+
+    def _store(self, datatype, obj):
+        self.serial += 1
+        self.objects[datatype][obj['id']] = obj
+        self.changed[datatype][obj['id']] = self.serial
+        return obj
+
+    def request(self, method, url, **kwargs):
+        if self.latency:
+            time.sleep(self.latency)
+        call = urlparse(url).path.split('/API/v7/', 1)[-1]
+        args = kwargs.get('data') or kwargs.get('params') or {}
+        self.requests.append(call)
+        handler = getattr(self, '_' + call.replace('/', '_'), None)
+        if handler is None:
+            return {'error_code': 404, 'error': 'Unknown call: %s' % call}
+        with self._lock:
+            return copy.deepcopy(handler(args))
+
+    def stream(self, method, url, chunk_size=65536, **kwargs):
+        text = json.dumps(self.request(method, url, **kwargs))
+        return (text[start:start + chunk_size]
+                for start in range(0, len(text), chunk_size))
+
+    # Calls
+
+    def _sync(self, args):
+        resource_types = json.loads(args.get('resource_types') or '["all"]')
+        commands = json.loads(args.get('commands') or '[]')
+        temp_id_mapping = {}
+        sync_status = {}
+        for cmd in commands:
+            if cmd['uuid'] not in self.statuses:
+                self.statuses[cmd['uuid']] = self._run(cmd, temp_id_mapping)
+            sync_status[cmd['uuid']] = self.statuses[cmd['uuid']]
+        try:
+            since = int(args.get('sync_token'))
+        except (TypeError, ValueError):
+            since = 0
+        response = {
+            'sync_token': str(self.serial),
+            'full_sync': since == 0,
+            'sync_status': sync_status,
+            'temp_id_mapping': temp_id_mapping,
+        }
+        for datatype, objects in self.objects.items():
+            if 'all' in resource_types or datatype in resource_types:
+                response[datatype] = [
+                    objects[obj_id] for obj_id, serial in
+                    self.changed[datatype].items() if serial > since]
+        if since == 0 and ('all' in resource_types or
+                           'user' in resource_types):
+            response['user'] = self.user
+        return response
+
+    def _items_get(self, args):
+        item = self.objects['items'].get(_int(args.get('item_id')))
+        if item is None or item.get('is_deleted'):
+            return {'error_code': 22, 'error': 'Item not found'}
+        return {
+            'item': item,
+            'project': self.objects['projects'].get(item.get('project_id')),
+            'notes': [note for note in self.objects['notes'].values()
+                      if note.get('item_id') == item['id'] and
+                      not note.get('is_deleted')],
+        }
+
+    def _projects_get_data(self, args):
+        project = self.objects['projects'].get(_int(args.get('project_id')))
+        if project is None or project.get('is_deleted'):
+            return {'error_code': 21, 'error': 'Project not found'}
+        return {
+            'project': project,
+            'items': [item for item in self.objects['items'].values()
+                      if item.get('project_id') == project['id'] and
+                      not item.get('checked') and not item.get('is_deleted')],
+        }
+
+    def _completed_get_all(self, args):
+        limit = _int(args.get('limit')) or 30
+        offset = _int(args.get('offset')) or 0
+        items = [item for item in self.objects['items'].values()
+                 if item.get('checked') and not item.get('is_deleted')]
+        items = items[offset:offset + limit]
+        projects = {item['project_id']: self.objects['projects'].get(
+                    item['project_id']) for item in items}
+        return {
+            'items': [{'id': item['id'], 'task_id': item['id'],
+                       'content': item.get('content'),
+                       'project_id': item.get('project_id'),
+                       'completed_date': item.get('date_completed')}
+                      for item in items],
+            'projects': projects,
+        }
+
+    # Commands
+
+    def _run(self, cmd, temp_id_mapping):
+        """
+        Runs a command, and returns its status.
+        """
+        kind, _, action = cmd['type'].partition('_')
+        datatype = COMMAND_TYPES.get(kind)
+        args = replace_ids(cmd.get('args', {}), temp_id_mapping)
+        handler = getattr(self, '_command_' + action, None)
+        if datatype is None or handler is None:
+            return {'error_code': 22, 'error': 'Invalid command'}
+        try:
+            if args.get('due_date_utc'):  # Stored as sent by syncs
+                args = dict(args, due_date_utc=format_datetime(
+                    parse_command_datetime(args['due_date_utc'])))
+            handler(datatype, args, cmd, temp_id_mapping)
+        except KeyError as e:
+            return {'error_code': 21, 'error': 'Not found: %s' % e}
+        except ValueError as e:
+            return {'error_code': 20, 'error': str(e)}
+        return 'ok'
+
+    def _command_add(self, datatype, args, cmd, temp_id_mapping):
+        obj = dict(args, id=next(self._ids), is_deleted=0)
+        if datatype == 'items':
+            obj.setdefault('checked', 0)
+            obj.setdefault('priority', 1)
+            obj.setdefault('project_id', self.user['inbox_project'])
+        if cmd.get('temp_id'):
+            temp_id_mapping[cmd['temp_id']] = obj['id']
+        self._store(datatype, obj)
+
+    def _command_update(self, datatype, args, cmd, temp_id_mapping):
+        obj = self.objects[datatype][args['id']]
+        obj.update(args)
+        self._store(datatype, obj)
+
+    def _command_delete(self, datatype, args, cmd, temp_id_mapping):
+        for obj_id in args.get('ids') or [args['id']]:
+            obj = self.objects[datatype][obj_id]
+            obj['is_deleted'] = 1
+            self._store(datatype, obj)
+
+    def _command_archive(self, datatype, args, cmd, temp_id_mapping):
+        for obj_id in args.get('ids') or [args['id']]:
+            obj = self.objects[datatype][obj_id]
+            obj['is_archived'] = 1
+            self._store(datatype, obj)
+
+    def _set_checked(self, args, checked):
+        for obj_id in args.get('ids') or [args['id']]:
+            obj = self.objects['items'][obj_id]
+            obj['checked'] = checked
+            obj['date_completed'] = (format_datetime(datetime.datetime.now(
+                datetime.timezone.utc)) if checked else None)
+            self._store('items', obj)
+
+    def _command_complete(self, datatype, args, cmd, temp_id_mapping):
+        self._set_checked(args, 1)
+
+    def _command_close(self, datatype, args, cmd, temp_id_mapping):
+        self._set_checked(args, 1)
+
+    def _command_uncomplete(self, datatype, args, cmd, temp_id_mapping):
+        self._set_checked(args, 0)
+
+    def _command_move(self, datatype, args, cmd, temp_id_mapping):
+        for ids in args['project_items'].values():
+            for obj_id in ids:
+                obj = self.objects['items'][obj_id]
+                obj['project_id'] = args['to_project']
+                self._store('items', obj)
+
+
+def _int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
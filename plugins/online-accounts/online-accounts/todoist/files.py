@@ -0,0 +1,15 @@
+# -*- coding: utf-8 -*-
+import os
+
+
+def atomic_write(filename, data):
+    """
+    Writes data to a temporary file next to filename, and renames it over
+    filename, so that readers see either the old or the new content.
+    """
+    tmp = '%s.%d.tmp' % (filename, os.getpid())
+    with open(tmp, 'w') as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, filename)
@@ -0,0 +1,166 @@
+# -*- coding: utf-8 -*-
+import os
+import json
+import atexit
+import weakref
+import threading
+
+from .files import atomic_write
+
+
+class CommandJournal(object):
+    """
+    Keeps the commands waiting to be committed in a file, one JSON command
+    per line, so that they survive the process exiting before they could be
+    sent.
+
+    Commands are appended as they are queued, and written (and synced to
+    disk) by a background thread, together with the others appended in the
+    meantime, so that queueing them doesn't wait for the disk.  The file is
+    rewritten without them once the server has processed them.
+
+    Pending writes are flushed when the interpreter exits.
+    """
+    def __init__(self, filename, default=None):
+        self.filename = filename
+        self.default = default
+        self._file = None
+        self._lines = []  # Lines appended but not written yet
+        self._lock = threading.Lock()
+        self._file_lock = threading.Lock()  # Keeps writes and rewrites in order
+        self._writer = None
+        _journals.add(self)
+
+    def read(self):
+        """
+        Returns the commands in the journal.  A last line cut short by a crash
+        while it was being written is ignored.
+        """
+        commands = []
+        try:
+            with open(self.filename) as f:
+                for line in f:
+                    try:
+                        commands.append(json.loads(line))
+                    except ValueError:
+                        break
+        except FileNotFoundError:
+            pass
+        return commands
+
+    def _dumps(self, cmd):
+        return json.dumps(cmd, separators=(',', ':'), default=self.default)
+
+    def append(self, cmd):
+        line = self._dumps(cmd) + '\n'
+        with self._lock:
+            self._lines.append(line)
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._write_pending)
+                self._writer.daemon = True
+                self._writer.start()
+
+    def _write_pending(self):
+        while True:
+            with self._lock:
+                if not self._lines:
+                    self._writer = None
+                    return
+            try:
+                self.flush()
+            except OSError:
+                # Tried again on the next append
+                with self._lock:
+                    self._writer = None
+                raise
+
+    def flush(self):
+        """
+        Writes, and syncs to disk, the commands appended so far.
+        """
+        with self._file_lock:
+            with self._lock:
+                lines, self._lines = self._lines, []
+            if not lines:
+                return
+            try:
+                if self._file is None:
+                    self._file = open(self.filename, 'a')
+                self._file.write(''.join(lines))
+                self._file.flush()
+                os.fsync(self._file.fileno())
+            except OSError:
+                self._close_file()
+                with self._lock:
+                    self._lines[:0] = lines
+                raise
+
+    def rewrite(self, commands):
+        """
+        Replaces the content of the journal with the given commands, which
+        include the ones appended but not written yet.
+        """
+        with self._file_lock:
+            with self._lock:
+                self._lines = []
+            self._close_file()
+            if commands:
+                atomic_write(self.filename, ''.join(
+                    self._dumps(cmd) + '\n' for cmd in commands))
+            else:
+                try:
+                    os.remove(self.filename)
+                except FileNotFoundError:
+                    pass
+
+    def close(self):
+        self.flush()
+        with self._file_lock:
+            self._close_file()
+
+    def _close_file(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+_journals = weakref.WeakSet()
+
+
+@atexit.register
+def _flush_all():
+    for journal in list(_journals):
+        journal.flush()
+
+
+class CommandQueue(list):
+    """
+    List of the commands waiting to be committed, that writes them to a
+    journal, if any, as they are appended, and then calls on_append, if
+    given.
+    """
+    def __init__(self, commands=(), journal=None, on_append=None):
+        super(CommandQueue, self).__init__(commands)
+        self.journal = journal
+        self.on_append = on_append
+        self._lock = threading.Lock()
+
+    def append(self, cmd):
+        with self._lock:
+            super(CommandQueue, self).append(cmd)
+            if self.journal is not None:
+                self.journal.append(cmd)
+        if self.on_append is not None:
+            self.on_append()
+
+    def discard(self, uuids):
+        """
+        Removes the commands with the given uuids, from the journal too.
+        """
+        uuids = set(uuids)
+        if not uuids:
+            return
+        with self._lock:
+            self[:] = [cmd for cmd in self if cmd['uuid'] not in uuids]
+            if self.journal is not None:
+                self.journal.rewrite(self)
@@ -1,5 +1,6 @@
 # -*- coding: utf-8 -*-
 from .. import models
+from ..query import Query, QueryEngine
 from .generic import Manager, AllMixin, GetByIdMixin, SyncMixin
 
 
@@ -37,6 +38,7 @@ class FiltersManager(Manager, AllMixin, GetByIdMixin, SyncMixin):
             'args': args,
         }
         self.queue.append(cmd)
+        self._touch(filter_id)
 
     def delete(self, filter_id):
         """
@@ -64,13 +66,37 @@ class FiltersManager(Manager, AllMixin, GetByIdMixin, SyncMixin):
         }
         self.queue.append(cmd)
 
+    def evaluate(self, filter_id):
+        """
+        Returns the local items matching a saved filter, without contacting
+        the server.  Raises QueryError if the filter uses unsupported syntax.
+        """
+        obj = self.get_by_id(filter_id, only_local=True)
+        if obj is None:
+            return None
+        engine = QueryEngine(self.api)
+        items = []
+        seen = set()
+        for query in Query.parse(obj['query']):
+            for item in engine.items(query):
+                if item['id'] not in seen:
+                    seen.add(item['id'])
+                    items.append(item)
+        return items
+
     def get(self, filter_id):
         """
         Gets an existing filter.
         """
         params = {'token': self.token,
                   'filter_id': filter_id}
-        obj = self.api._get('filters/get', params=params)
+        return self.api._get('filters/get', params=params,
+                             then=self._merge_get)
+
+    def _merge_get(self, obj):
+        """
+        Merges the answer of get() into the local state.
+        """
         if obj and 'error' in obj:
             return None
         data = {'filters': []}
@@ -1,4 +1,7 @@
 # -*- coding: utf-8 -*-
+from ..cache import INDEXED_FIELDS
+
+
 class Manager(object):
 
     # should be re-defined in a subclass
@@ -21,20 +24,46 @@ class Manager(object):
     def token(self):
         return self.api.token
 
+    def _touch(self, obj_id):
+        """
+        Marks the local object with the given id as modified, so that it is
+        written to the cache, if there is such an object.
+        """
+        store = self.state[self.state_name]
+        obj = store.get(obj_id)
+        if obj is not None:
+            store.touch(obj)
+
 
 class AllMixin(object):
     def all(self, filt=None):
         return list(filter(filt, self.state[self.state_name]))
 
+    def find(self, **where):
+        """
+        Returns the objects whose fields have the given values.  The indexes
+        of the cache are used when it has them and is up to date.
+        """
+        store = self.state[self.state_name]
+        select = getattr(self.api._cache, 'select', None)
+        if (select is not None and not store.dirty and where and
+                all(field in INDEXED_FIELDS for field in where)):
+            found = (store.get(store.key(data))
+                     for data in select(self.state_name, **where))
+            return [obj for obj in found if obj is not None]
+        return [store.get(store.key(data)) for data in store.iter_data()
+                if all(data.get(field) == value
+                       for field, value in where.items())]
+
 
 class GetByIdMixin(object):
     def get_by_id(self, obj_id, only_local=False):
         """
         Finds and returns the object based on its id.
         """
-        for obj in self.state[self.state_name]:
-            if obj['id'] == obj_id or obj.temp_id == str(obj_id):
-                return obj
+        obj = self.state[self.state_name].get(obj_id)
+        if obj is not None:
+            return obj
 
         if not only_local and self.object_type is not None:
             getter = getattr(self.api, '%s/get' % self.object_type)
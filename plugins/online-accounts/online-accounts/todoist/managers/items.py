@@ -1,5 +1,6 @@
 # -*- coding: utf-8 -*-
 from .. import models
+from ..columns import ItemTable
 from .generic import Manager, AllMixin, GetByIdMixin, SyncMixin
 
 
@@ -8,6 +9,18 @@ class ItemsManager(Manager, AllMixin, GetByIdMixin, SyncMixin):
     state_name = 'items'
     object_type = 'item'
 
+    _table = None
+
+    def table(self):
+        """
+        Returns a columnar table of the local items, that is only rebuilt
+        after they change.
+        """
+        store = self.state[self.state_name]
+        if self._table is None or self._table.version != store.version:
+            self._table = ItemTable(store)
+        return self._table
+
     def add(self, content, project_id, **kwargs):
         """
         Creates a local item object.
@@ -38,6 +51,7 @@ class ItemsManager(Manager, AllMixin, GetByIdMixin, SyncMixin):
             'args': args,
         }
         self.queue.append(cmd)
+        self._touch(item_id)
 
     def delete(self, item_ids):
         """
@@ -51,6 +65,8 @@ class ItemsManager(Manager, AllMixin, GetByIdMixin, SyncMixin):
             }
         }
         self.queue.append(cmd)
+        for item_id in item_ids:
+            self._touch(item_id)
 
     def move(self, project_items, to_project):
         """
@@ -65,6 +81,9 @@ class ItemsManager(Manager, AllMixin, GetByIdMixin, SyncMixin):
             },
         }
         self.queue.append(cmd)
+        for item_ids in project_items.values():
+            for item_id in item_ids:
+                self._touch(item_id)
 
     def close(self, item_id):
         """
@@ -78,6 +97,7 @@ class ItemsManager(Manager, AllMixin, GetByIdMixin, SyncMixin):
             },
         }
         self.queue.append(cmd)
+        self._touch(item_id)
 
     def complete(self, item_ids, force_history=0):
         """
@@ -92,6 +112,8 @@ class ItemsManager(Manager, AllMixin, GetByIdMixin, SyncMixin):
             },
         }
         self.queue.append(cmd)
+        for item_id in item_ids:
+            self._touch(item_id)
 
     def uncomplete(self, item_ids, update_item_orders=1, restore_state=None):
         """
@@ -109,6 +131,8 @@ class ItemsManager(Manager, AllMixin, GetByIdMixin, SyncMixin):
             'args': args,
         }
         self.queue.append(cmd)
+        for item_id in item_ids:
+            self._touch(item_id)
 
     def update_date_complete(self, item_id, new_date_utc=None, date_string=None,
                              is_forward=None):
@@ -130,6 +154,7 @@ class ItemsManager(Manager, AllMixin, GetByIdMixin, SyncMixin):
             'args': args,
         }
         self.queue.append(cmd)
+        self._touch(item_id)
 
     def update_orders_indents(self, ids_to_orders_indents):
         """
@@ -172,7 +197,13 @@ class ItemsManager(Manager, AllMixin, GetByIdMixin, SyncMixin):
         """
         params = {'token': self.token,
                   'item_id': item_id}
-        obj = self.api._get('items/get', params=params)
+        return self.api._get('items/get', params=params,
+                             then=self._merge_get)
+
+    def _merge_get(self, obj):
+        """
+        Merges the answer of get() into the local state.
+        """
         if obj and 'error' in obj:
             return None
         data = {'projects': [], 'items': [], 'notes': []}
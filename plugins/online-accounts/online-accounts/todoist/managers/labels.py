@@ -37,6 +37,7 @@ class LabelsManager(Manager, AllMixin, GetByIdMixin, SyncMixin):
             'args': args,
         }
         self.queue.append(cmd)
+        self._touch(label_id)
 
     def delete(self, label_id):
         """
@@ -70,7 +71,13 @@ class LabelsManager(Manager, AllMixin, GetByIdMixin, SyncMixin):
         """
         params = {'token': self.token,
                   'label_id': label_id}
-        obj = self.api._get('labels/get', params=params)
+        return self.api._get('labels/get', params=params,
+                             then=self._merge_get)
+
+    def _merge_get(self, obj):
+        """
+        Merges the answer of get() into the local state.
+        """
         if obj and 'error' in obj:
             return None
         data = {'labels': []}
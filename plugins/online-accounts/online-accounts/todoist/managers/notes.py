@@ -19,6 +19,7 @@ class GenericNotesManager(Manager, AllMixin, GetByIdMixin, SyncMixin):
             'args': args,
         }
         self.queue.append(cmd)
+        self._touch(note_id)
 
     def delete(self, note_id):
         """
@@ -61,7 +62,13 @@ class NotesManager(GenericNotesManager):
         """
         params = {'token': self.token,
                   'note_id': note_id}
-        obj = self.api._get('notes/get', params=params)
+        return self.api._get('notes/get', params=params,
+                             then=self._merge_get)
+
+    def _merge_get(self, obj):
+        """
+        Merges the answer of get() into the local state.
+        """
         if obj and 'error' in obj:
             return None
         data = {'notes': []}
@@ -41,6 +41,7 @@ class ProjectsManager(Manager, AllMixin, GetByIdMixin, SyncMixin):
             'args': args,
         }
         self.queue.append(cmd)
+        self._touch(project_id)
 
     def delete(self, project_ids):
         """
@@ -130,7 +131,13 @@ class ProjectsManager(Manager, AllMixin, GetByIdMixin, SyncMixin):
         """
         params = {'token': self.token,
                   'project_id': project_id}
-        obj = self.api._get('project/get', params=params)
+        return self.api._get('project/get', params=params,
+                             then=self._merge_get)
+
+    def _merge_get(self, obj):
+        """
+        Merges the answer of get() into the local state.
+        """
         if obj and 'error' in obj:
             return None
         data = {'projects': [], 'project_notes': []}
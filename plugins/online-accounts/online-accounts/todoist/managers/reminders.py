@@ -37,6 +37,7 @@ class RemindersManager(Manager, AllMixin, GetByIdMixin, SyncMixin):
             'args': args,
         }
         self.queue.append(cmd)
+        self._touch(reminder_id)
 
     def delete(self, reminder_id):
         """
@@ -57,7 +58,13 @@ class RemindersManager(Manager, AllMixin, GetByIdMixin, SyncMixin):
         """
         params = {'token': self.token,
                   'reminder_id': reminder_id}
-        obj = self.api._get('reminders/get', params=params)
+        return self.api._get('reminders/get', params=params,
+                             then=self._merge_get)
+
+    def _merge_get(self, obj):
+        """
+        Merges the answer of get() into the local state.
+        """
         if obj and 'error' in obj:
             return None
         data = {'reminders': []}
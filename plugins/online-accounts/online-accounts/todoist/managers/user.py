@@ -42,11 +42,8 @@ class UserManager(Manager):
         """
         Logins user, and returns the response received by the server.
         """
-        data = self.api._post('user/login', data={'email': email,
-                              'password': password})
-        if 'token' in data:
-            self.api.token = data['token']
-        return data
+        return self.api._post('user/login', data={'email': email,
+                              'password': password}, then=self._set_token)
 
     def login_with_google(self, email, oauth2_token, **kwargs):
         """
@@ -56,10 +53,8 @@ class UserManager(Manager):
         """
         data = {'email': email, 'oauth2_token': oauth2_token}
         data.update(kwargs)
-        data = self.api._post('user/login_with_google', data=data)
-        if 'token' in data:
-            self.api.token = data['token']
-        return data
+        return self.api._post('user/login_with_google', data=data,
+                              then=self._set_token)
 
     def register(self, email, full_name, password, **kwargs):
         """
@@ -67,7 +62,13 @@ class UserManager(Manager):
         """
         data = {'email': email, 'full_name': full_name, 'password': password}
         data.update(kwargs)
-        data = self.api._post('user/register', data=data)
+        return self.api._post('user/register', data=data,
+                              then=self._set_token)
+
+    def _set_token(self, data):
+        """
+        Uses the token of a user that logged in or registered.
+        """
         if 'token' in data:
             self.api.token = data['token']
         return data
@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+import bisect
+import threading
+import contextlib
+from time import perf_counter
+
+
+# Upper bounds of the buckets of the histograms of durations, in seconds,
+# and of sizes, like the number of commands in a commit.
+TIME_BUCKETS = (0.001, 0.002, 0.005, 0.01, 0.02, 0.05, 0.1, 0.2, 0.5, 1, 2,
+                5, 10, 30)
+SIZE_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+
+
+class Histogram(object):
+    """
+    Counts of the values recorded falling in each bucket, the last bucket
+    holding the values above all of the bounds, along with their count,
+    total, minimum and maximum.
+    """
+    def __init__(self, bounds=TIME_BUCKETS):
+        self.bounds = bounds
+        self.buckets = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = None
+
+    def add(self, value):
+        self.buckets[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.total += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def quantile(self, q):
+        """
+        Returns an upper bound of the q quantile, from the buckets.
+        """
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.bounds, self.buckets):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+    def snapshot(self):
+        return {
+            'count': self.count,
+            'total': self.total,
+            'min': self.min,
+            'max': self.max,
+            'mean': self.total / self.count if self.count else None,
+            'p50': self.quantile(0.5),
+            'p95': self.quantile(0.95),
+            'bounds': list(self.bounds),
+            'buckets': list(self.buckets),
+        }
+
+
+class Metrics(object):
+    """
+    Measures of what an API object spends its time on: histograms of the
+    duration of calls and of other values (like the commands per commit),
+    counters (like bytes sent and received, or objects merged by type), and
+    gauges, functions returning the current value of something, like the
+    depth of the queue, read when a snapshot is taken.
+
+    Hooks are called with the name and value of everything recorded, for
+    instance to forward them to another monitoring system.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.histograms = {}
+        self.counters = {}
+        self.gauges = {}
+        self.hooks = []
+
+    def observe(self, name, value, bounds=TIME_BUCKETS):
+        """
+        Records a value in the histogram of the given name.
+        """
+        with self._lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = Histogram(bounds)
+            histogram.add(value)
+        for hook in self.hooks:
+            hook(name, value)
+
+    def count(self, name, value=1):
+        """
+        Adds value to the counter of the given name.
+        """
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+        for hook in self.hooks:
+            hook(name, value)
+
+    def gauge(self, name, function):
+        """
+        Sets the function returning the current value of a gauge.
+        """
+        self.gauges[name] = function
+
+    @contextlib.contextmanager
+    def time(self, name):
+        """
+        Context manager recording how long its block takes.
+        """
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, perf_counter() - start)
+
+    def snapshot(self):
+        """
+        Returns the current values of all of the metrics, as plain data.
+        """
+        with self._lock:
+            snapshot = {
+                'histograms': {name: histogram.snapshot() for name, histogram
+                               in self.histograms.items()},
+                'counters': dict(self.counters),
+            }
+        snapshot['gauges'] = {name: function() for name, function
+                              in self.gauges.items()}
+        return snapshot
+
+    def reset(self):
+        """
+        Clears the histograms and counters.  Gauges are kept.
+        """
+        with self._lock:
+            self.histograms.clear()
+            self.counters.clear()
@@ -1,13 +1,221 @@
+import gc
+import sys
+import operator
+import contextlib
 from pprint import pformat
+from itertools import compress, repeat
+from collections.abc import MutableMapping
+
+
+class _Missing(object):
+    """
+    Value of the fields of a record that are not set.
+    """
+    __slots__ = ()
+
+    def __repr__(self):
+        return '<missing>'
+
+    def __reduce__(self):
+        # Copies and pickles stay the same object
+        return '_missing'
+
+
+_missing = _Missing()
+
+
+class Record(MutableMapping):
+    """
+    Compact mapping used as the data of the models.  The values of the
+    fields known for each type of object are kept in a list, in the order of
+    _fields, and only unknown ones go to an overflow dict, with their keys
+    interned.
+    """
+    __slots__ = ('_values', '_extra')
+
+    #: names of the known fields, and the position of each one, set by
+    #: record_class()
+    _fields = ()
+    _positions = {}
+
+    def __init__(self, data=None):
+        self._extra = None
+        if not data:
+            self._values = [_missing] * len(self._fields)
+            return
+        self._values = values = list(map(data.get, self._fields,
+                                         repeat(_missing)))
+        if len(data) > len(values) - values.count(_missing):
+            self._extra = {sys.intern(key): data[key] for key
+                           in data.keys() - self._positions.keys()}
+
+    def __getitem__(self, key):
+        position = self._positions.get(key)
+        if position is not None:
+            value = self._values[position]
+            if value is _missing:
+                raise KeyError(key)
+            return value
+        if self._extra is None:
+            raise KeyError(key)
+        return self._extra[key]
+
+    def get(self, key, default=None):
+        position = self._positions.get(key)
+        if position is not None:
+            value = self._values[position]
+            return default if value is _missing else value
+        if self._extra is None:
+            return default
+        return self._extra.get(key, default)
+
+    def __contains__(self, key):
+        return self.get(key, _missing) is not _missing
+
+    def __setitem__(self, key, value):
+        position = self._positions.get(key)
+        if position is not None:
+            self._values[position] = value
+        else:
+            if self._extra is None:
+                self._extra = {}
+            self._extra[sys.intern(key)] = value
+
+    def __delitem__(self, key):
+        position = self._positions.get(key)
+        if position is not None:
+            if self._values[position] is _missing:
+                raise KeyError(key)
+            self._values[position] = _missing
+        elif self._extra is None:
+            raise KeyError(key)
+        else:
+            del self._extra[key]
+
+    def update(self, data=(), **kwargs):
+        if isinstance(data, dict) and not kwargs:
+            for key, value in data.items():
+                self[key] = value
+        else:
+            MutableMapping.update(self, data, **kwargs)
+
+    def __iter__(self):
+        for key, value in zip(self._fields, self._values):
+            if value is not _missing:
+                yield key
+        if self._extra:
+            for key in list(self._extra):
+                yield key
+
+    def __len__(self):
+        return (len(self._values) - self._values.count(_missing) +
+                len(self._extra or ()))
+
+    def __repr__(self):
+        return repr(self.to_dict())
+
+    def to_dict(self):
+        """
+        Returns the data as a plain dict.
+        """
+        return thaw_data(copy_data(self))
+
+
+def copy_data(data):
+    """
+    Returns a shallow copy of the data of a model (a record or a dict) that
+    is as cheap as possible to take, for instance while holding the lock of
+    the state, to be turned into a dict by thaw_data() later.
+    """
+    # Records are told apart without isinstance(), which is slow for
+    # abstract base classes
+    if type(data) is dict:
+        return dict(data)
+    return (data._fields, data._values[:],
+            dict(data._extra) if data._extra else None)
+
+
+def thaw_data(copy):
+    """
+    Returns the dict of a copy made by copy_data().
+    """
+    if type(copy) is not tuple:
+        return copy
+    fields, values, extra = copy
+    data = dict(compress(zip(fields, values),
+                         map(operator.is_not, values, repeat(_missing))))
+    if extra:
+        data.update(extra)
+    return data
+
+
+@contextlib.contextmanager
+def paused_gc():
+    """
+    Pauses the cyclic garbage collector while lots of records, or copies of
+    them, are created, which it would otherwise go through along with the
+    whole state again and again.  They don't form reference cycles.
+    """
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def record_class(name, fields):
+    """
+    Creates a Record subclass for the given fields.
+    """
+    cls = type(name, (Record,), {'__slots__': ()})
+    cls._fields = tuple(sys.intern(field) for field in fields)
+    cls._positions = {field: position for position, field
+                      in enumerate(cls._fields)}
+    return cls
+
+
+CollaboratorRecord = record_class('CollaboratorRecord', (
+    'id', 'email', 'full_name', 'timezone', 'image_id'))
+CollaboratorStateRecord = record_class('CollaboratorStateRecord', (
+    'project_id', 'user_id', 'state', 'is_deleted'))
+FilterRecord = record_class('FilterRecord', (
+    'id', 'name', 'query', 'color', 'item_order', 'is_deleted',
+    'is_favorite'))
+ItemRecord = record_class('ItemRecord', (
+    'id', 'user_id', 'project_id', 'content', 'date_string', 'date_lang',
+    'due_date_utc', 'priority', 'indent', 'item_order', 'day_order',
+    'collapsed', 'labels', 'assigned_by_uid', 'responsible_uid', 'checked',
+    'in_history', 'is_deleted', 'is_archived', 'sync_id', 'date_added'))
+LabelRecord = record_class('LabelRecord', (
+    'id', 'name', 'color', 'item_order', 'is_deleted', 'is_favorite'))
+NoteRecord = record_class('NoteRecord', (
+    'id', 'posted_uid', 'item_id', 'project_id', 'content',
+    'file_attachment', 'uids_to_notify', 'is_deleted', 'is_archived',
+    'posted'))
+ProjectRecord = record_class('ProjectRecord', (
+    'id', 'name', 'color', 'indent', 'item_order', 'collapsed', 'shared',
+    'is_deleted', 'is_archived', 'is_favorite', 'inbox_project',
+    'team_inbox'))
+ReminderRecord = record_class('ReminderRecord', (
+    'id', 'notify_uid', 'item_id', 'service', 'type', 'due_date_utc',
+    'date_string', 'date_lang', 'mm_offset', 'minute_offset', 'name',
+    'loc_lat', 'loc_long', 'loc_trigger', 'radius', 'is_deleted'))
 
 
 class Model(object):
     """
     Implements a generic object.
     """
+    __slots__ = ('temp_id', 'data', 'api')
+
+    #: Record class used to store the data, if any
+    record = None
+
     def __init__(self, data, api):
         self.temp_id = ''
-        self.data = data
+        self.data = self.record(data) if self.record is not None else data
         self.api = api
 
     def __setitem__(self, key, value):
@@ -26,6 +234,8 @@ class Collaborator(Model):
     """
     Implements a collaborator.
     """
+    __slots__ = ()
+    record = CollaboratorRecord
     def delete(self, project_id):
         """
         Deletes a collaborator from a shared project.
@@ -37,13 +247,16 @@ class CollaboratorState(Model):
     """
     Implements a collaborator state.
     """
-    pass
+    __slots__ = ()
+    record = CollaboratorStateRecord
 
 
 class Filter(Model):
     """
     Implements a filter.
     """
+    __slots__ = ()
+    record = FilterRecord
     def update(self, **kwargs):
         """
         Updates filter.
@@ -63,6 +276,8 @@ class Item(Model):
     """
     Implements an item.
     """
+    __slots__ = ()
+    record = ItemRecord
     def update(self, **kwargs):
         """
         Updates item.
@@ -129,6 +344,8 @@ class Label(Model):
     """
     Implements a label.
     """
+    __slots__ = ()
+    record = LabelRecord
     def update(self, **kwargs):
         """
         Updates label.
@@ -148,13 +365,16 @@ class LiveNotification(Model):
     """
     Implements a live notification.
     """
-    pass
+    __slots__ = ()
 
 
 class GenericNote(Model):
     """
     Implements a note.
     """
+    __slots__ = ()
+    record = NoteRecord
+
     #: has to be defined in subclasses
     local_manager = None
 
@@ -177,24 +397,30 @@ class Note(GenericNote):
     """
     Implement an item note.
     """
-    def __init__(self, data, api):
-        GenericNote.__init__(self, data, api)
-        self.local_manager = self.api.notes
+    __slots__ = ()
+
+    @property
+    def local_manager(self):
+        return self.api.notes
 
 
 class ProjectNote(GenericNote):
     """
     Implement a project note.
     """
-    def __init__(self, data, api):
-        GenericNote.__init__(self, data, api)
-        self.local_manager = self.api.project_notes
+    __slots__ = ()
+
+    @property
+    def local_manager(self):
+        return self.api.project_notes
 
 
 class Project(Model):
     """
     Implements a project.
     """
+    __slots__ = ()
+    record = ProjectRecord
     def update(self, **kwargs):
         """
         Updates project.
@@ -240,6 +466,8 @@ class Reminder(Model):
     """
     Implements a reminder.
     """
+    __slots__ = ()
+    record = ReminderRecord
     def update(self, **kwargs):
         """
         Updates reminder.
@@ -0,0 +1,263 @@
+# -*- coding: utf-8 -*-
+import copy
+
+
+# Commands that delete the objects created by each type of add command.
+DELETE_COMMANDS = {
+    'filter_delete': 'filter_add',
+    'item_delete': 'item_add',
+    'label_delete': 'label_add',
+    'note_delete': 'note_add',
+    'project_delete': 'project_add',
+    'reminder_delete': 'reminder_add',
+}
+
+# Commands acting on a list of ids, that can be folded into one when the
+# rest of their arguments are the same.
+MULTI_ID_COMMANDS = ('item_complete', 'item_delete', 'item_uncomplete',
+                     'project_delete')
+
+
+class OptimizedQueue(object):
+    """
+    Result of optimize(): the commands to send, and for the uuid of each of
+    them the uuids of the queued commands it stands for.  cancelled holds the
+    temporary ids of the objects that were added and deleted in the same
+    queue, and dropped the uuids of the commands that need not be sent.
+    """
+    def __init__(self, commands, covers, cancelled, dropped):
+        self.commands = commands
+        self.covers = covers
+        self.cancelled = cancelled
+        self.dropped = dropped
+
+
+def iter_scalars(value):
+    """
+    Yields all the scalar values found in a (possibly nested) command, dict
+    keys included, as ids may be used as keys in some arguments.
+    """
+    if isinstance(value, dict):
+        for key, item in value.items():
+            yield key
+            for scalar in iter_scalars(item):
+                yield scalar
+    elif isinstance(value, (list, tuple)):
+        for item in value:
+            for scalar in iter_scalars(item):
+                yield scalar
+    else:
+        yield value
+
+
+def _ids(cmd):
+    args = cmd['args']
+    if 'ids' in args:
+        return list(args['ids'])
+    if 'id' in args:
+        return [args['id']]
+    return []
+
+
+class _Optimizer(object):
+    def __init__(self, queue):
+        self.out = []
+        self.covers = {}
+        self.cancelled = []
+        self.dropped = []
+        self.refs = {}  # Value -> positions in out of the commands using it
+        for cmd in queue:
+            self.add(dict(cmd, args=copy.deepcopy(cmd.get('args', {}))))
+
+    def result(self):
+        commands = [cmd for cmd in self.out if cmd is not None]
+        covers = {cmd['uuid']: self.covers[cmd['uuid']] for cmd in commands}
+        return OptimizedQueue(commands, covers, self.cancelled, self.dropped)
+
+    def _register(self, position, cmd):
+        values = list(iter_scalars(cmd['args']))
+        if cmd.get('temp_id'):
+            values.append(cmd['temp_id'])
+        for value in values:
+            self.refs.setdefault(value, []).append(position)
+
+    def _last_ref(self, value):
+        positions = [position for position in self.refs.get(value, ())
+                     if self.out[position] is not None]
+        return positions[-1] if positions else -1
+
+    def _append(self, cmd):
+        self.out.append(cmd)
+        self.covers[cmd['uuid']] = [cmd['uuid']]
+        self._register(len(self.out) - 1, cmd)
+
+    def _merge(self, position, cmd, args):
+        target = self.out[position]
+        target['args'].update(args)
+        self.covers[target['uuid']].append(cmd['uuid'])
+        self._register(position, cmd)
+
+    def add(self, cmd):
+        kind = cmd['type']
+        if kind.endswith('_update') and 'id' in cmd['args']:
+            if self._add_update(cmd):
+                return
+        elif kind in DELETE_COMMANDS:
+            if self._add_delete(cmd):
+                return
+        if kind in MULTI_ID_COMMANDS:
+            if self._add_multi_id(cmd):
+                return
+        self._append(cmd)
+
+    def _add_update(self, cmd):
+        """
+        Drops updates without fields, and merges the others into the last
+        command using the same id, if it is an update of the same type or the
+        command adding the object, and no command after it uses the other
+        values of the update.
+        """
+        args = cmd['args']
+        obj_id = args['id']
+        if len(args) == 1:
+            self.dropped.append(cmd['uuid'])
+            return True
+        position = self._last_ref(obj_id)
+        if position < 0:
+            return False
+        # The update can't be moved before the commands creating the objects
+        # it refers to, like a label added after the item
+        if any(self._last_ref(value) > position
+               for key, value in args.items() if key != 'id'
+               for value in iter_scalars(value)):
+            return False
+        target = self.out[position]
+        if target['type'] == cmd['type'] and target['args'].get('id') == obj_id:
+            self._merge(position, cmd, args)
+            return True
+        add_type = cmd['type'][:-len('_update')] + '_add'
+        if target['type'] == add_type and target.get('temp_id') == obj_id:
+            self._merge(position, cmd, {key: value for key, value in
+                                        args.items() if key != 'id'})
+            return True
+        return False
+
+    def _add_delete(self, cmd):
+        """
+        Cancels the objects added in the same queue, along with their
+        updates, if no other command depends on them.  Returns True if there
+        is nothing left to delete.
+        """
+        add_type = DELETE_COMMANDS[cmd['type']]
+        update_type = add_type[:-len('_add')] + '_update'
+        remaining = []
+        for obj_id in _ids(cmd):
+            positions = sorted(set(
+                position for position in self.refs.get(obj_id, ())
+                if self.out[position] is not None))
+            commands = [self.out[position] for position in positions]
+            adds = [other for other in commands if other['type'] == add_type and
+                    other.get('temp_id') == obj_id]
+            if adds and all(
+                    other in adds or (other['type'] == update_type and
+                                      other['args'].get('id') == obj_id)
+                    for other in commands):
+                for position in positions:
+                    for uuid in self.covers.pop(self.out[position]['uuid']):
+                        self.dropped.append(uuid)
+                    self.out[position] = None
+                self.cancelled.append(obj_id)
+            else:
+                remaining.append(obj_id)
+        if not remaining:
+            self.dropped.append(cmd['uuid'])
+            return True
+        if 'ids' in cmd['args']:
+            cmd['args']['ids'] = remaining
+        return False
+
+    def _add_multi_id(self, cmd):
+        """
+        Folds the ids of a command into the previous command of the same type
+        and arguments, if no command in between uses them.
+        """
+        others = {key: value for key, value in cmd['args'].items()
+                  if key != 'ids'}
+        for position in range(len(self.out) - 1, -1, -1):
+            target = self.out[position]
+            if target is None or target['type'] != cmd['type']:
+                continue
+            target_others = {key: value for key, value in
+                             target['args'].items() if key != 'ids'}
+            if target_others != others:
+                return False
+            ids = cmd['args']['ids']
+            if any(self._last_ref(obj_id) > position for obj_id in ids):
+                return False
+            merged = target['args']['ids'] + [obj_id for obj_id in ids if
+                                              obj_id not in target['args']['ids']]
+            self._merge(position, cmd, {'ids': merged})
+            return True
+        return False
+
+
+def optimize(queue):
+    """
+    Rewrites a queue of commands into a shorter equivalent one: updates of
+    the same object are merged (into the command adding it, when it is in
+    the queue), updates without fields are dropped, objects added and then
+    deleted are not sent at all, and commands acting on lists of ids are
+    folded together.  Commands are only moved past others that don't use
+    the same ids, and the queue itself is not modified.
+    """
+    return _Optimizer(queue).result()
+
+
+def split_commands(commands, size):
+    """
+    Splits a list of commands into chunks of at most size commands.  Chunks
+    end, whenever possible, after the last command using any temporary id
+    created within them.  When a temporary id is used by more commands than
+    fit in a chunk, the following chunks have to be sent with the real id,
+    see replace_ids().
+    """
+    last_use = {}
+    for position, cmd in enumerate(commands):
+        for value in iter_scalars(cmd['args']):
+            if value in last_use:
+                last_use[value] = position
+        if cmd.get('temp_id'):
+            last_use[cmd['temp_id']] = position
+    chunks = []
+    start = 0
+    while start < len(commands):
+        end = min(start + size, len(commands))
+        reach = start
+        clean = None
+        for position in range(start, end):
+            temp_id = commands[position].get('temp_id')
+            if temp_id:
+                reach = max(reach, last_use[temp_id])
+            if reach <= position:
+                clean = position + 1
+        if clean is None or end == len(commands):
+            clean = end
+        chunks.append(commands[start:clean])
+        start = clean
+    return chunks
+
+
+def replace_ids(value, mapping):
+    """
+    Returns a copy of a command's arguments with the temporary ids found in
+    mapping replaced by the real ones.
+    """
+    if isinstance(value, dict):
+        return {mapping.get(key, key): replace_ids(item, mapping)
+                for key, item in value.items()}
+    if isinstance(value, list):
+        return [replace_ids(item, mapping) for item in value]
+    try:
+        return mapping.get(value, value)
+    except TypeError:
+        return value
@@ -0,0 +1,404 @@
+# -*- coding: utf-8 -*-
+import re
+import time
+import bisect
+import datetime
+
+from .dates import to_timestamp, MONTH_NUMBERS
+
+
+class QueryError(Exception):
+    pass
+
+
+# Tokens of the filter syntax, terms being anything between the operators.
+TOKEN_RE = re.compile(r'\s*(?:([()&|!,])|([^()&|!,]+))')
+
+
+class Query(object):
+    """
+    Parsed filter query, like 'today | overdue', '(p1 | p2) & @work' or
+    '##Work & !no date'.  Commas separate queries whose results are returned
+    separately, so parse() returns one Query per part.
+
+    Supported terms: today, tomorrow, yesterday, overdue (od), no date,
+    'N days' / 'next N days', dates (2016-10-17, Oct 17, 17 Oct),
+    'due before: <date>', 'due after: <date>', p1 to p4, @label, no labels,
+    #project, ##project (with its subprojects), 'search: <text>' and
+    all / view all.
+    """
+    def __init__(self, text, tree):
+        self.text = text
+        self.tree = tree
+
+    def __repr__(self):
+        return 'Query(%r)' % self.text
+
+    @property
+    def type(self):
+        """
+        Type of query, as reported by the server: 'overdue', 'date' for a
+        single date, or 'filter'.
+        """
+        if self.tree[0] == 'term':
+            if self.tree[1] == 'overdue':
+                return 'overdue'
+            if self.tree[1] in ('date', 'today', 'tomorrow', 'yesterday'):
+                return 'date'
+        return 'filter'
+
+    @classmethod
+    def parse(cls, text):
+        """
+        Parses a query, returning a list with a Query for each of its comma
+        separated parts, with the text of the part as written.
+        """
+        tokens = []
+        texts = []  # Text of each part
+        start = position = 0
+        text = text.strip()
+        while position < len(text):
+            match = TOKEN_RE.match(text, position)
+            if match is None:
+                raise QueryError('Invalid query: %r' % text)
+            position = match.end()
+            if match.group(1):
+                tokens.append(match.group(1))
+                if match.group(1) == ',':
+                    texts.append(text[start:match.start(1)].strip())
+                    start = position
+            elif match.group(2).strip():
+                tokens.append(('term', match.group(2).strip()))
+        texts.append(text[start:].strip())
+        queries = []
+        part = []
+        for token in tokens + [',']:
+            if token == ',':
+                if not part:
+                    raise QueryError('Empty query in %r' % text)
+                parser = _Parser(part)
+                queries.append(cls(texts[len(queries)], parser.parse()))
+                part = []
+            else:
+                part.append(token)
+        return queries
+
+
+class _Parser(object):
+    """
+    Recursive descent parser, '!' binding tighter than '&', and '&' than
+    '|'.
+    """
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.position = 0
+
+    def peek(self):
+        if self.position < len(self.tokens):
+            return self.tokens[self.position]
+        return None
+
+    def next(self):
+        token = self.peek()
+        self.position += 1
+        return token
+
+    def parse(self):
+        tree = self.parse_or()
+        if self.peek() is not None:
+            raise QueryError('Unexpected %r' % (self.peek(),))
+        return tree
+
+    def parse_or(self):
+        tree = self.parse_and()
+        while self.peek() == '|':
+            self.next()
+            tree = ('or', tree, self.parse_and())
+        return tree
+
+    def parse_and(self):
+        tree = self.parse_not()
+        while self.peek() == '&':
+            self.next()
+            tree = ('and', tree, self.parse_not())
+        return tree
+
+    def parse_not(self):
+        if self.peek() == '!':
+            self.next()
+            return ('not', self.parse_not())
+        return self.parse_atom()
+
+    def parse_atom(self):
+        token = self.next()
+        if token == '(':
+            tree = self.parse_or()
+            if self.next() != ')':
+                raise QueryError('Missing )')
+            return tree
+        if not isinstance(token, tuple):
+            raise QueryError('Unexpected %r' % (token,))
+        return parse_term(token[1])
+
+
+def parse_date(text, today):
+    """
+    Parses the dates accepted in queries, returning a date or None.
+    """
+    try:
+        return _parse_date(text.strip().lower(), today)
+    except ValueError:  # Like Feb 30
+        return None
+
+
+def _parse_date(text, today):
+    if text == 'today':
+        return today
+    if text == 'tomorrow':
+        return today + datetime.timedelta(days=1)
+    if text == 'yesterday':
+        return today - datetime.timedelta(days=1)
+    match = re.match(r'^(\d{4})-(\d{1,2})-(\d{1,2})$', text)
+    if match:
+        year, month, day = (int(group) for group in match.groups())
+        return datetime.date(year, month, day)
+    match = (re.match(r'^(?P<month>[a-z]{3})[a-z]*\.? (?P<day>\d{1,2})$',
+                      text) or
+             re.match(r'^(?P<day>\d{1,2}) (?P<month>[a-z]{3})[a-z]*\.?$',
+                      text))
+    if match:
+        month = MONTH_NUMBERS.get(match.group('month').capitalize())
+        if month is not None:
+            date = datetime.date(today.year, month, int(match.group('day')))
+            if date < today:  # Dates without year are the next ones
+                date = date.replace(year=today.year + 1)
+            return date
+    return None
+
+
+def parse_term(text):
+    """
+    Parses a single term of a query into a tuple, starting with 'term' and
+    the kind of term.
+    """
+    lower = ' '.join(text.lower().split())
+    if lower in ('today', 'tomorrow', 'yesterday', 'overdue', 'no date',
+                 'no labels', 'all'):
+        return ('term', lower)
+    if lower == 'od':
+        return ('term', 'overdue')
+    if lower == 'no due date':
+        return ('term', 'no date')
+    if lower == 'view all':
+        return ('term', 'all')
+    match = re.match(r'^(?:next )?(\d+) days?$', lower)
+    if match:
+        return ('term', 'days', int(match.group(1)))
+    match = re.match(r'^p([1-4])$', lower)
+    if match:
+        # p1 is the most urgent, which is priority 4 for the API
+        return ('term', 'priority', 5 - int(match.group(1)))
+    match = re.match(r'^due (before|after): *(.+)$', lower)
+    if match:
+        return ('term', 'due ' + match.group(1), match.group(2))
+    match = re.match(r'^search: *(.+)$', text, re.IGNORECASE)
+    if match:
+        return ('term', 'search', match.group(1).lower())
+    if text.startswith('@'):
+        return ('term', 'label', text[1:].strip().lower())
+    if text.startswith('##'):
+        return ('term', 'project', text[2:].strip().lower(), True)
+    if text.startswith('#'):
+        return ('term', 'project', text[1:].strip().lower(), False)
+    if parse_date(lower, datetime.date.today()) is not None:
+        return ('term', 'date', lower)
+    raise QueryError('Unsupported query term: %r' % text)
+
+
+class ItemIndex(object):
+    """
+    Indexes of the uncompleted items by project, label, priority and due
+    date, used to evaluate queries without scanning all of the items.
+    """
+    def __init__(self, items):
+        self.version = items.version
+        self.all = set()
+        self.by_project = {}
+        self.by_label = {}
+        self.by_priority = {}
+        self.no_due = set()
+        self.no_labels = set()
+        due = []
+        for data in items.iter_data():
+            if data.get('checked') or data.get('is_deleted'):
+                continue
+            item_id = data['id']
+            self.all.add(item_id)
+            self.by_project.setdefault(data.get('project_id'),
+                                       set()).add(item_id)
+            self.by_priority.setdefault(data.get('priority') or 1,
+                                        set()).add(item_id)
+            labels = data.get('labels') or ()
+            for label_id in labels:
+                self.by_label.setdefault(label_id, set()).add(item_id)
+            if not labels:
+                self.no_labels.add(item_id)
+            try:
+                timestamp = to_timestamp(data.get('due_date_utc'))
+            except ValueError:
+                timestamp = None
+            if timestamp is None:
+                self.no_due.add(item_id)
+            else:
+                due.append((timestamp, item_id))
+        due.sort(key=lambda entry: entry[0])
+        self.due_timestamps = [timestamp for timestamp, _ in due]
+        self.due_ids = [item_id for _, item_id in due]
+
+    def due_between(self, start=None, end=None):
+        """
+        Returns the items due in [start, end), open ended if None.
+        """
+        low = 0 if start is None else bisect.bisect_left(self.due_timestamps,
+                                                         start)
+        high = (len(self.due_ids) if end is None else
+                bisect.bisect_left(self.due_timestamps, end))
+        return set(self.due_ids[low:high])
+
+
+class QueryEngine(object):
+    """
+    Evaluates queries against the local state of an API object.
+    """
+    def __init__(self, api, now=None):
+        self.api = api
+        self.now = now
+
+    def _index(self):
+        items = self.api.state['items']
+        index = self.api._item_index
+        if index is None or index.version != items.version:
+            index = ItemIndex(items)
+            self.api._item_index = index
+        return index
+
+    def _day_start(self, date):
+        return time.mktime(date.timetuple())
+
+    def run(self, queries):
+        """
+        Evaluates a list of query strings, and returns the results the way
+        the server does: a list with one result per query, with its type and
+        the data of the matching items.
+        """
+        results = []
+        for text in queries:
+            for query in Query.parse(text):
+                results.append({
+                    'query': query.text,
+                    'type': query.type,
+                    'data': [dict(item.data) for item in self.items(query)],
+                })
+        return results
+
+    def items(self, query):
+        """
+        Returns the local items matching a parsed query, by due date and
+        then by order.
+        """
+        store = self.api.state['items']
+        ids = self.evaluate(query.tree, self._index())
+        items = [store.get(item_id) for item_id in ids]
+        return sorted((item for item in items if item is not None),
+                      key=self._sort_key)
+
+    def _sort_key(self, item):
+        try:
+            due = to_timestamp(item.data.get('due_date_utc'))
+        except ValueError:
+            due = None
+        return (due is None, due or 0, item.data.get('item_order') or 0)
+
+    def evaluate(self, tree, index):
+        """
+        Returns the set of ids of the items matching a parsed query.
+        """
+        kind = tree[0]
+        if kind == 'or':
+            return self.evaluate(tree[1], index) | self.evaluate(tree[2], index)
+        if kind == 'and':
+            return self.evaluate(tree[1], index) & self.evaluate(tree[2], index)
+        if kind == 'not':
+            return index.all - self.evaluate(tree[1], index)
+        return self._evaluate_term(tree, index)
+
+    def _evaluate_term(self, term, index):
+        now = self.now if self.now is not None else time.time()
+        today = datetime.date.fromtimestamp(now)
+        kind = term[1]
+        if kind == 'all':
+            return set(index.all)
+        if kind == 'no date':
+            return set(index.no_due)
+        if kind == 'no labels':
+            return set(index.no_labels)
+        if kind == 'overdue':
+            return index.due_between(None, now)
+        if kind in ('today', 'tomorrow', 'yesterday', 'date'):
+            date = parse_date(term[2] if kind == 'date' else kind, today)
+            if date is None:
+                raise QueryError('Invalid date: %r' % term[2])
+            start = self._day_start(date)
+            end = self._day_start(date + datetime.timedelta(days=1))
+            return index.due_between(start, end)
+        if kind == 'days':
+            end = today + datetime.timedelta(days=term[2])
+            return index.due_between(self._day_start(today),
+                                     self._day_start(end))
+        if kind in ('due before', 'due after'):
+            date = parse_date(term[2], today)
+            if date is None:
+                raise QueryError('Invalid date: %r' % term[2])
+            if kind == 'due before':
+                return index.due_between(None, self._day_start(date))
+            end = date + datetime.timedelta(days=1)
+            return index.due_between(self._day_start(end), None)
+        if kind == 'priority':
+            return set(index.by_priority.get(term[2], ()))
+        if kind == 'label':
+            found = set()
+            for label in self.api.state['labels'].iter_data():
+                if label.get('name', '').lower() == term[2]:
+                    found |= index.by_label.get(label['id'], set())
+            return found
+        if kind == 'project':
+            found = set()
+            for project_id in self._project_ids(term[2], term[3]):
+                found |= index.by_project.get(project_id, set())
+            return found
+        if kind == 'search':
+            return {data['id'] for data in self.api.state['items'].iter_data()
+                    if data['id'] in index.all and
+                    term[2] in (data.get('content') or '').lower()}
+        raise QueryError('Unsupported query term: %r' % (term,))
+
+    def _project_ids(self, name, subprojects):
+        """
+        Returns the ids of the projects with the given name, and of their
+        subprojects if asked to.
+        """
+        projects = sorted(self.api.state['projects'].iter_data(),
+                          key=lambda data: data.get('item_order') or 0)
+        ids = []
+        parent_indent = None
+        for data in projects:
+            indent = data.get('indent') or 1
+            if parent_indent is not None and indent > parent_indent:
+                ids.append(data['id'])
+                continue
+            parent_indent = None
+            if data.get('name', '').lower() == name:
+                ids.append(data['id'])
+                if subprojects:
+                    parent_indent = indent
+        return ids
@@ -0,0 +1,185 @@
+# -*- coding: utf-8 -*-
+
+
+def object_key(obj):
+    """
+    Returns the primary key of a regular object, its id.
+    """
+    return obj['id']
+
+
+def collaborator_state_key(obj):
+    """
+    Returns the primary key of a collaborator state, which has no id of its
+    own and is identified by its project and user ids.
+    """
+    return (obj['project_id'], obj['user_id'])
+
+
+class ObjectStore(object):
+    """
+    Holds the local objects of a single resource type.
+
+    Behaves like the list it replaces (iteration, len, append and remove keep
+    insertion order), but objects are kept in a hash table by primary key,
+    with another index by temporary id, so that lookups don't need to walk
+    the whole state.
+
+    Objects can also be loaded as raw records, in which case the model
+    wrapping each of them is only built, by calling factory with the record,
+    the first time it is looked up or iterated over.
+
+    It also records which objects were added, modified or removed since the
+    last call to pop_changes(), so that caches can write only what changed.
+    """
+    def __init__(self, key=object_key, factory=None):
+        self.key = key
+        self.factory = factory
+        self._objects = {}  # Models or raw records, in insertion order
+        self._by_temp_id = {}
+        self._changed = {}
+        self._removed = {}
+        self.version = 0  # Increased on every change
+
+    def __iter__(self):
+        for key, obj in self._objects.items():
+            if isinstance(obj, dict):
+                obj = self._hydrate(key, obj)
+            yield obj
+
+    def __len__(self):
+        return len(self._objects)
+
+    def __contains__(self, obj):
+        try:
+            return self._objects.get(self.key(obj)) is obj
+        except (KeyError, TypeError):
+            return False
+
+    def __repr__(self):
+        return '%s(%r)' % (self.__class__.__name__, list(self))
+
+    @property
+    def dirty(self):
+        return bool(self._changed or self._removed)
+
+    def append(self, obj):
+        self._objects[self.key(obj)] = obj
+        self._index(obj)
+        self.touch(obj)
+
+    def remove(self, obj):
+        key = self.key(obj)
+        if self._objects.get(key) is not obj:
+            raise ValueError('%r is not in the store' % (obj,))
+        del self._objects[key]
+        self._unindex(obj)
+        self._changed.pop(key, None)
+        self._removed[key] = True
+        self.version += 1
+
+    def clear(self):
+        for key in self._objects:
+            self._removed[key] = True
+        self._objects.clear()
+        self._by_temp_id.clear()
+        self._changed.clear()
+        self.version += 1
+
+    def load(self, records):
+        """
+        Adds raw records, that are only wrapped into models when used.  They
+        are not recorded as changes, as they are expected to come from the
+        cache.
+        """
+        for data in records:
+            self._objects[self.key(data)] = data
+        self.version += 1
+
+    def iter_data(self):
+        """
+        Iterates over the data of the objects, without building the models of
+        the raw records.
+        """
+        for obj in self._objects.values():
+            yield obj if isinstance(obj, dict) else obj.data
+
+    def touch(self, obj):
+        """
+        Records that an object was modified.
+        """
+        key = self.key(obj)
+        self._changed[key] = obj
+        self._removed.pop(key, None)
+        self.version += 1
+
+    def pop_changes(self):
+        """
+        Returns the objects modified and the keys removed since the last call,
+        and starts recording from scratch.
+        """
+        changed, self._changed = self._changed, {}
+        removed, self._removed = self._removed, {}
+        return list(changed.values()), list(removed)
+
+    def restore_changes(self, changed, removed):
+        """
+        Records again the changes returned by pop_changes(), when they could
+        not be saved, unless the objects were changed or removed since.
+        """
+        for obj in changed:
+            key = self.key(obj)
+            if key in self._objects and key not in self._changed:
+                self._changed[key] = self._objects[key]
+        for key in removed:
+            if key not in self._objects:
+                self._removed[key] = True
+
+    def get(self, key):
+        """
+        Finds an object by its primary key, or by the temporary id it was
+        created with.  Returns None if there is no such object.
+        """
+        obj = self._objects.get(key)
+        if obj is None:
+            return self._by_temp_id.get(str(key))
+        if isinstance(obj, dict):
+            obj = self._hydrate(key, obj)
+        return obj
+
+    def get_by_temp_id(self, temp_id):
+        """
+        Finds an object by the temporary id it was created with, or still
+        identified by it, like the ones read back from the cache before they
+        were committed.
+        """
+        obj = self._by_temp_id.get(temp_id)
+        if obj is None and temp_id in self._objects:
+            obj = self.get(temp_id)
+        return obj
+
+    def reindex(self, obj, old_key):
+        """
+        Updates the indexes after the primary key of an object changed, as
+        happens when a temporary id is replaced with the real one.
+        """
+        if self._objects.get(old_key) is obj:
+            del self._objects[old_key]
+            self._changed.pop(old_key, None)
+        self._removed[old_key] = True
+        self.append(obj)
+
+    def _hydrate(self, key, data):
+        obj = self.factory(data)
+        self._objects[key] = obj
+        return obj
+
+    def _index(self, obj):
+        temp_id = getattr(obj, 'temp_id', '')
+        if temp_id:
+            self._by_temp_id[temp_id] = obj
+
+    def _unindex(self, obj):
+        temp_id = getattr(obj, 'temp_id', '')
+        if temp_id and self._by_temp_id.get(temp_id) is obj:
+            del self._by_temp_id[temp_id]
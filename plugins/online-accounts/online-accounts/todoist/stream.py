@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+import json
+import codecs
+
+
+_decoder = json.JSONDecoder()
+
+WHITESPACE = ' \t\n\r'
+
+
+class _Reader(object):
+    """
+    Buffers the chunks of a JSON document, keeping only the part that was
+    not parsed yet.
+    """
+    def __init__(self, chunks):
+        self.chunks = iter(chunks)
+        self.text = codecs.getincrementaldecoder('utf-8')()
+        self.buffer = ''
+        self.position = 0
+        self.done = False
+
+    def more(self):
+        """
+        Reads the next chunk, returning False at the end of the document.
+        """
+        for chunk in self.chunks:
+            if isinstance(chunk, bytes):
+                chunk = self.text.decode(chunk)
+            if chunk:
+                self.buffer = self.buffer[self.position:] + chunk
+                self.position = 0
+                return True
+        self.done = True
+        return False
+
+    def peek(self):
+        """
+        Returns the next character that is not whitespace.
+        """
+        while True:
+            while (self.position < len(self.buffer) and
+                   self.buffer[self.position] in WHITESPACE):
+                self.position += 1
+            if self.position < len(self.buffer):
+                return self.buffer[self.position]
+            if not self.more():
+                raise ValueError('Unexpected end of JSON document')
+
+    def expect(self, *chars):
+        char = self.peek()
+        if char not in chars:
+            raise ValueError('Expected %s at %r' % (' or '.join(chars), char))
+        self.position += 1
+        return char
+
+    def value(self):
+        """
+        Parses the next value, reading as many chunks as it needs.
+        """
+        self.peek()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.buffer, self.position)
+            except ValueError:
+                if not self.more():
+                    raise
+                continue
+            # A number cut at the end of the buffer, like 1 in 1.5 or 1e3,
+            # goes on in the next chunk.
+            if (not self.done and isinstance(value, (int, float)) and
+                    (end == len(self.buffer) or self.buffer[end] in '.eE') and
+                    self.more()):
+                continue
+            self.position = end
+            return value
+
+
+def iter_members(chunks, split=()):
+    """
+    Parses a JSON object from an iterable of chunks of text or UTF-8 bytes,
+    yielding its members as (key, value) pairs as soon as they are read.
+    The arrays of the keys in split are not built: a (key, element) pair is
+    yielded for each of their elements instead, so that only one of them is
+    held in memory at a time.
+    """
+    reader = _Reader(chunks)
+    reader.expect('{')
+    if reader.peek() == '}':
+        return
+    while True:
+        key = reader.value()
+        reader.expect(':')
+        if key in split and reader.peek() == '[':
+            reader.expect('[')
+            if reader.peek() == ']':
+                reader.expect(']')
+            else:
+                while True:
+                    yield key, reader.value()
+                    if reader.expect(',', ']') == ']':
+                        break
+        else:
+            yield key, reader.value()
+        if reader.expect(',', '}') == '}':
+            return
@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+import gzip
+from urllib.parse import urlencode
+
+import requests
+import requests.adapters
+
+
+def decode_response(response):
+    """
+    Returns the JSON object of a response, or its text if it isn't JSON.
+    """
+    try:
+        return response.json()
+    except ValueError:
+        return response.text
+
+
+class HTTPTransport(object):
+    """
+    Sends the requests of the API over HTTP.  Transports are objects with a
+    request(method, url, **kwargs) method taking the arguments of requests'
+    own, and returning the decoded answer.
+
+    The connections of the session are kept alive in pools of at most
+    pool_maxsize connections for each of pool_connections hosts, requests
+    time out after timeout seconds (a (connect, read) tuple, or None to wait
+    forever), and form bodies of at least compress_min_size bytes, like the
+    commands of large commits, are sent gzipped when it is set.  The bytes
+    sent and received are counted in metrics, if given.
+    """
+    def __init__(self, session=None, pool_connections=4, pool_maxsize=10,
+                 timeout=(10, 60), compress_min_size=None, metrics=None):
+        if session is None:
+            session = requests.Session()
+            adapter = requests.adapters.HTTPAdapter(
+                pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+        self.session = session
+        self.timeout = timeout
+        self.compress_min_size = compress_min_size
+        self.metrics = metrics
+
+    def _prepare(self, kwargs):
+        kwargs.setdefault('timeout', self.timeout)
+        if ((self.compress_min_size is not None or self.metrics is not None) and
+                isinstance(kwargs.get('data'), dict) and 'files' not in kwargs):
+            body = urlencode(kwargs['data']).encode('utf-8')
+            if (self.compress_min_size is not None and
+                    len(body) >= self.compress_min_size):
+                kwargs['data'] = body = gzip.compress(body)
+                headers = dict(kwargs.get('headers') or {})
+                headers['Content-Encoding'] = 'gzip'
+                headers['Content-Type'] = 'application/x-www-form-urlencoded'
+                kwargs['headers'] = headers
+            if self.metrics is not None:
+                self.metrics.count('bytes_sent', len(body))
+        return kwargs
+
+    def request(self, method, url, **kwargs):
+        response = getattr(self.session, method)(url, **self._prepare(kwargs))
+        if self.metrics is not None:
+            self.metrics.count('bytes_received', len(response.content))
+        return decode_response(response)
+
+    def stream(self, method, url, chunk_size=65536, **kwargs):
+        """
+        Sends a request, and returns an iterator over the chunks of the body
+        of the answer, as they are received.
+        """
+        kwargs['stream'] = True
+        response = getattr(self.session, method)(url, **self._prepare(kwargs))
+        response.raise_for_status()
+        chunks = response.iter_content(chunk_size)
+        if self.metrics is not None:
+            chunks = self._count_received(chunks)
+        return chunks
+
+    def _count_received(self, chunks):
+        for chunk in chunks:
+            self.metrics.count('bytes_received', len(chunk))
+            yield chunk
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+
+# worker.py
+#
+# Copyright (C) 2016 Wolfang Torres <wolfang.torres@gmail.com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from gi.repository import GLib
+
+from todoist.transport import HTTPTransport
+
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+from traceback import print_exception
+from time import perf_counter
+
+
+# Threads doing the network and disk work of the providers, of all the
+# accounts together, which is also the number of connections kept alive
+WORKER_THREADS = 4
+# Time each batch of work done on the main loop can take, in seconds, so
+# that the window stays responsive
+BATCH_BUDGET = 0.008
+
+_executor = None
+_session = None
+_lock = Lock()
+
+
+def get_executor():
+    """Returns the pool of worker threads shared by all the accounts"""
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=WORKER_THREADS)
+        return _executor
+
+
+def get_session():
+    """Returns the HTTP session shared by all the accounts, whose pool
+    keeps a connection alive for each worker thread"""
+    global _session
+    with _lock:
+        if _session is None:
+            _session = HTTPTransport(pool_maxsize=WORKER_THREADS).session
+        return _session
+
+
+def run_in_worker(function, callback=None, error_callback=None):
+    """Runs function on a worker thread, and then calls callback with its
+    result, or error_callback with the exception it raised, on the main
+    loop"""
+    future = get_executor().submit(function)
+    future.add_done_callback(
+        lambda future: GLib.idle_add(
+            _deliver_result, future, callback, error_callback))
+    return future
+
+
+def _deliver_result(future, callback, error_callback):
+    error = future.exception()
+    if error is not None:
+        if error_callback is not None:
+            error_callback(error)
+        else:
+            print_exception(type(error), error, error.__traceback__)
+    elif callback is not None:
+        callback(future.result())
+    return GLib.SOURCE_REMOVE
+
+
+def iterate_in_batches(items, function, done=None, progress=None,
+                       budget=BATCH_BUDGET):
+    """Calls function with each of the items on the main loop, when it is
+    idle, in batches taking at most budget seconds.  progress is called
+    with the number of items processed after each batch, and done at the
+    end"""
+    iterator = iter(items)
+    processed = [0]
+
+    def run_batch():
+        deadline = perf_counter() + budget
+        for item in iterator:
+            function(item)
+            processed[0] += 1
+            if perf_counter() >= deadline:
+                if progress is not None:
+                    progress(processed[0])
+                return GLib.SOURCE_CONTINUE
+        if progress is not None:
+            progress(processed[0])
+        if done is not None:
+            done()
+        return GLib.SOURCE_REMOVE
+
+    return GLib.idle_add(run_batch)
@@ -0,0 +1,169 @@
+# -*- coding: utf-8 -*-
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__))), 'online-accounts'))
+
+from todoist.api import TodoistAPI, SyncError, RESOURCE_TYPES
+from todoist.fake import FakeTodoistServer
+
+
+class StaticTransport(object):
+    """Answers every request with the same response"""
+
+    def __init__(self, response):
+        self.response = response
+        self.requests = 0
+
+    def request(self, method, url, **kwargs):
+        self.requests += 1
+        return self.response
+
+
+class CommitErrorTest(unittest.TestCase):
+
+    def api(self, response):
+        api = TodoistAPI('token', cache=None,
+                         transport=StaticTransport(response))
+        project = api.projects.add('Project')
+        api.items.add('Task', project['id'])
+        return api
+
+    def test_commit_of_error_page(self):
+        api = self.api('<html>502 Bad Gateway</html>')
+        with self.assertRaises(SyncError):
+            api.commit(raise_on_error=False)
+        self.assertEqual(len(api.queue), 2)
+
+    def test_commit_without_sync_status(self):
+        api = self.api({'error': 'Service Unavailable', 'error_code': 503})
+        with self.assertRaises(SyncError):
+            api.commit(raise_on_error=False, chunk_size=1)
+        self.assertEqual(api.transport.requests, 1)
+        self.assertEqual(len(api.queue), 2)
+        self.assertEqual(len(api.items.all()), 1)
+
+
+class SyncErrorTest(unittest.TestCase):
+
+    def test_sync_of_error_page(self):
+        api = TodoistAPI('token', cache=None,
+                         transport=StaticTransport('<html>502</html>'))
+        with self.assertRaises(SyncError):
+            api.sync()
+        self.assertEqual(api.sync_token, '*')
+
+    def test_sync_of_error_object(self):
+        api = TodoistAPI('token', cache=None,
+                         transport=StaticTransport({'error': 'Forbidden'}))
+        self.assertEqual(api.sync(), {'error': 'Forbidden'})
+        self.assertEqual(api.sync_token, '*')
+
+
+class ReopenTest(unittest.TestCase):
+
+    def setUp(self):
+        self.cache = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.cache)
+
+    def api(self, **kwargs):
+        return TodoistAPI('token', cache=self.cache, **kwargs)
+
+    def check_reopen(self, **kwargs):
+        api = self.api(**kwargs)
+        item = api.items.add('Task', 1)
+        item.update(content='Changed')
+        api.close()
+        api = self.api(**kwargs)
+        self.addCleanup(api.close)
+        self.assertEqual(len(api.queue), 2)
+        self.assertEqual([(item['id'], item['content'])
+                          for item in api.items.all()],
+                         [(api.queue[0]['temp_id'], 'Changed')])
+
+    def test_reopen_keeps_local_objects(self):
+        self.check_reopen()
+
+    def test_reopen_keeps_local_objects_written_in_background(self):
+        self.check_reopen(cache_debounce=60)
+
+    def test_reopen_with_sqlite(self):
+        self.check_reopen(cache_backend='sqlite')
+
+
+class SyncTokensTest(unittest.TestCase):
+
+    def setUp(self):
+        self.server = FakeTodoistServer()
+        self.server.add('projects', name='Inbox')
+
+    def synced_api(self, **kwargs):
+        api = TodoistAPI('token', transport=self.server, **kwargs)
+        self.addCleanup(api.close)
+        api.sync()
+        return api
+
+    def test_partial_sync_keeps_its_own_token(self):
+        api = self.synced_api(cache=None)
+        full_token = api.sync_token
+        self.server.add('projects', name='Work')
+        self.server.add('items', content='Task')
+        api.sync(resource_types=['items'])
+        items_token = api.sync_tokens['items'][1]
+        self.assertNotEqual(items_token, full_token)
+        self.assertEqual(api.sync_token, full_token)
+        self.assertEqual(api._get_sync_token(['items']), items_token)
+        self.assertEqual(api._get_sync_token(['items', 'projects']),
+                         full_token)
+        # The project added before the sync of the items isn't missed
+        api.sync(resource_types=['projects'])
+        self.assertEqual(sorted(data['name'] for data
+                                in api['projects'].iter_data()),
+                         ['Inbox', 'Work'])
+
+    def test_full_sync_clears_tokens(self):
+        api = self.synced_api(cache=None)
+        api.sync(resource_types=['items'])
+        api.sync()
+        self.assertEqual(api.sync_tokens, {})
+        self.assertEqual(api.sync_token, str(self.server.serial))
+
+    def test_every_type_synced_on_its_own(self):
+        api = self.synced_api(cache=None)
+        api.sync(resource_types=['items'])
+        items_token = api.sync_tokens['items'][1]
+        self.server.add('items', content='Task')
+        others = [resource_type for resource_type in RESOURCE_TYPES
+                  if resource_type != 'items']
+        api.sync(resource_types=others)
+        # The oldest token becomes the one of a full sync
+        self.assertEqual(api.sync_token, items_token)
+        self.assertEqual(sorted(api.sync_tokens), others)
+
+    def check_reopen(self, cache_backend):
+        cache = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, cache)
+        api = self.synced_api(cache=cache, cache_backend=cache_backend)
+        self.server.add('items', content='Task')
+        api.sync(resource_types=['items'])
+        tokens, sync_token = dict(api.sync_tokens), api.sync_token
+        api.close()
+        api = TodoistAPI('token', cache=cache, cache_backend=cache_backend)
+        self.addCleanup(api.close)
+        self.assertEqual(api.sync_tokens, tokens)
+        self.assertEqual(api.sync_token, sync_token)
+        self.assertEqual(api._get_sync_token(['items']), tokens['items'][1])
+
+    def test_reopen_keeps_tokens(self):
+        self.check_reopen('json')
+
+    def test_reopen_keeps_tokens_with_sqlite(self):
+        self.check_reopen('sqlite')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+import os
+import sys
+import json
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__))), 'online-accounts'))
+
+from todoist import cache
+from todoist.api import TodoistAPI
+
+
+SYNC = {
+    'sync_token': 'first',
+    'projects': [{'id': 1, 'name': 'Inbox'}],
+    'items': [{'id': 100, 'content': 'a', 'project_id': 1},
+              {'id': 101, 'content': 'b', 'project_id': 1}],
+    'user': {'id': 5, 'email': 'user@example.com'},
+}
+
+
+class CacheTest(object):
+    """Tests run against each cache backend"""
+
+    backend = None
+
+    def setUp(self):
+        self.path = tempfile.mkdtemp() + '/'
+        self.addCleanup(shutil.rmtree, self.path)
+
+    def api(self):
+        api = TodoistAPI('token', cache=self.path, cache_backend=self.backend)
+        self.addCleanup(api.close)
+        return api
+
+    def synced_api(self):
+        api = self.api()
+        api._apply_sync(['all'], json.loads(json.dumps(SYNC)))
+        return api
+
+    def contents(self, api):
+        return ({data['id']: data['content']
+                 for data in api['items'].iter_data()},
+                [data['name'] for data in api['projects'].iter_data()],
+                api['user'].get('id'), api.sync_token)
+
+    def test_round_trip(self):
+        api = self.synced_api()
+        expected = self.contents(api)
+        api.close()
+        self.assertEqual(self.contents(self.api()), expected)
+
+    def test_changes_and_removals(self):
+        api = self.synced_api()
+        api._apply_sync(['all'], {
+            'sync_token': 'second',
+            'items': [{'id': 100, 'content': 'A', 'project_id': 1},
+                      {'id': 101, 'is_deleted': 1},
+                      {'id': 102, 'content': 'c', 'project_id': 1}],
+        })
+        api.close()
+        self.assertEqual(self.contents(self.api()),
+                         ({100: 'A', 102: 'c'}, ['Inbox'], 5, 'second'))
+
+    def test_changes_kept_after_failed_write(self):
+        api = self.synced_api()
+        write = api._cache.write
+        api._cache.write = mock.Mock(side_effect=OSError('No space left'))
+        with self.assertRaises(OSError):
+            api._apply_sync(['all'], {
+                'sync_token': 'second',
+                'items': [{'id': 100, 'content': 'A', 'project_id': 1},
+                          {'id': 101, 'is_deleted': 1}],
+                'user': {'id': 6},
+            })
+        api._cache.write = write
+        api.close()
+        self.assertEqual(self.contents(self.api()),
+                         ({100: 'A'}, ['Inbox'], 6, 'second'))
+
+
+class JSONCacheTest(CacheTest, unittest.TestCase):
+
+    backend = 'json'
+
+    def test_only_changed_types_rewritten(self):
+        api = self.synced_api()
+        with mock.patch('todoist.cache.atomic_write',
+                        side_effect=cache.atomic_write) as atomic_write:
+            api._apply_sync(['items'], {
+                'sync_token': 'second',
+                'items': [{'id': 100, 'content': 'A', 'project_id': 1}],
+            })
+        self.assertEqual(
+            sorted(os.path.basename(call[0][0])
+                   for call in atomic_write.call_args_list),
+            ['items.json', 'sync'])
+
+    def test_legacy_cache(self):
+        with open(self.path + 'token.json', 'w') as f:
+            json.dump({'items': SYNC['items'], 'projects': SYNC['projects'],
+                       'user': SYNC['user']}, f)
+        with open(self.path + 'token.sync', 'w') as f:
+            f.write('legacy')
+        api = self.api()
+        self.assertEqual(self.contents(api),
+                         ({100: 'a', 101: 'b'}, ['Inbox'], 5, 'legacy'))
+        api.close()
+        self.assertFalse(os.path.exists(self.path + 'token.json'))
+        self.assertEqual(self.contents(self.api()),
+                         ({100: 'a', 101: 'b'}, ['Inbox'], 5, 'legacy'))
+
+
+class SQLiteCacheTest(CacheTest, unittest.TestCase):
+
+    backend = 'sqlite'
+
+
+if __name__ == '__main__':
+    unittest.main()
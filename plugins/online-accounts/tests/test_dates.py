@@ -0,0 +1,40 @@
+# -*- coding: utf-8 -*-
+import os
+import sys
+import datetime
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__))), 'online-accounts'))
+
+from todoist.dates import (parse_datetime, format_datetime,
+                           format_command_datetime, parse_command_datetime)
+
+
+class DatesTest(unittest.TestCase):
+
+    def test_synced_date_round_trip(self):
+        for text in ('Fri 26 Sep 2014 08:25:05 +0000',
+                     'Mon 01 Jan 2018 23:59:59 -0430'):
+            self.assertEqual(format_datetime(parse_datetime(text)), text)
+
+    def test_command_date_is_utc(self):
+        date = parse_datetime('Mon 01 Jan 2018 23:59:59 -0430')
+        self.assertEqual(format_command_datetime(date), '2018-01-02T04:29')
+        self.assertEqual(parse_command_datetime('2018-01-02T04:29'),
+                         datetime.datetime(2018, 1, 2, 4, 29,
+                                           tzinfo=datetime.timezone.utc))
+
+    def test_empty_dates(self):
+        self.assertIsNone(parse_datetime(None))
+        self.assertIsNone(parse_command_datetime(''))
+
+    def test_invalid_dates(self):
+        with self.assertRaises(ValueError):
+            parse_datetime('26/09/2014')
+        with self.assertRaises(ValueError):
+            parse_command_datetime('Fri 26 Sep 2014 08:25:05 +0000')
+
+
+if __name__ == '__main__':
+    unittest.main()
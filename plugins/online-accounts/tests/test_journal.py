@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__))), 'online-accounts'))
+
+from todoist.api import TodoistAPI
+from todoist.fake import FakeTodoistServer
+from todoist.journal import CommandJournal, CommandQueue
+
+
+def command(uuid):
+    return {'type': 'item_close', 'uuid': uuid, 'args': {'id': 1}}
+
+
+class JournalTest(unittest.TestCase):
+
+    def setUp(self):
+        path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, path)
+        self.filename = os.path.join(path, 'token.journal')
+        self.journal = CommandJournal(self.filename)
+        self.addCleanup(self.journal.close)
+
+    def test_appended_while_writing_written_together(self):
+        with self.journal._file_lock:
+            for uuid in ('a', 'b', 'c'):
+                self.journal.append(command(uuid))
+            self.assertFalse(os.path.exists(self.filename))
+        self.journal.flush()
+        self.assertEqual(self.journal.read(),
+                         [command('a'), command('b'), command('c')])
+
+    def test_truncated_last_line_ignored(self):
+        self.journal.append(command('a'))
+        self.journal.close()
+        with open(self.filename, 'a') as f:
+            f.write('{"type": "item_cl')
+        self.assertEqual(self.journal.read(), [command('a')])
+
+    def test_rewrite(self):
+        self.journal.append(command('a'))
+        self.journal.flush()
+        self.journal.append(command('b'))
+        self.journal.rewrite([command('b')])
+        self.journal.flush()
+        self.assertEqual(self.journal.read(), [command('b')])
+        self.journal.rewrite([])
+        self.assertFalse(os.path.exists(self.filename))
+
+    def test_queue_discard(self):
+        queue = CommandQueue(journal=self.journal)
+        queue.append(command('a'))
+        queue.append(command('b'))
+        queue.discard(['a'])
+        self.assertEqual(queue, [command('b')])
+        self.assertEqual(self.journal.read(), [command('b')])
+
+
+class ReplayTest(unittest.TestCase):
+
+    def setUp(self):
+        self.cache = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.cache)
+        self.server = FakeTodoistServer()
+
+    def api(self):
+        api = TodoistAPI('token', cache=self.cache, transport=self.server)
+        self.addCleanup(api.close)
+        return api
+
+    def test_queue_replayed_after_reopen(self):
+        api = self.api()
+        item = api.items.add('Task', 1)
+        item.complete()
+        queued = list(api.queue)
+        api.close()
+        api = self.api()
+        self.assertEqual(api.queue, queued)
+        api.commit()
+        self.assertEqual(len(api.queue), 0)
+        self.assertEqual([(data['content'], data['checked']) for data
+                          in self.server.objects['items'].values()],
+                         [('Task', 1)])
+
+    def test_commands_processed_once(self):
+        # The process exits after the server processed the commands, but
+        # before they were removed from the journal
+        api = self.api()
+        api.items.add('Task', 1)
+        api.close()
+        journal = os.path.join(self.cache, 'token.journal')
+        shutil.copy(journal, journal + '.copy')
+        api = self.api()
+        api.commit()
+        api.close()
+        self.assertFalse(os.path.exists(journal))
+        os.rename(journal + '.copy', journal)
+        api = self.api()
+        self.assertEqual(len(api.queue), 1)
+        api.commit()
+        self.assertEqual(len(api.queue), 0)
+        self.assertEqual(len(self.server.objects['items']), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,151 @@
+# -*- coding: utf-8 -*-
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__))), 'online-accounts'))
+
+from todoist.api import TodoistAPI
+from todoist.fake import FakeTodoistServer
+from todoist.optimizer import optimize, split_commands
+
+
+def command(kind, uuid, temp_id=None, **args):
+    cmd = {'type': kind, 'uuid': uuid, 'args': args}
+    if temp_id:
+        cmd['temp_id'] = temp_id
+    return cmd
+
+
+class OptimizeTest(unittest.TestCase):
+
+    def assertCreatedBeforeUse(self, commands):
+        created = set()
+        for cmd in commands:
+            for value in cmd['args'].get('labels', ()):
+                self.assertIn(value, created)
+            if cmd.get('temp_id'):
+                created.add(cmd['temp_id'])
+
+    def test_update_merged_into_update(self):
+        commands = optimize([
+            command('item_update', 'u1', id=5, content='a'),
+            command('item_update', 'u2', id=5, priority=4),
+        ]).commands
+        self.assertEqual(len(commands), 1)
+        self.assertEqual(commands[0]['args'],
+                         {'id': 5, 'content': 'a', 'priority': 4})
+
+    def test_update_not_merged_into_add_before_its_values(self):
+        commands = optimize([
+            command('item_add', 'u1', temp_id='T', content='a', project_id=1),
+            command('label_add', 'u2', temp_id='L', name='l'),
+            command('item_update', 'u3', id='T', labels=['L']),
+        ]).commands
+        self.assertEqual([cmd['type'] for cmd in commands],
+                         ['item_add', 'label_add', 'item_update'])
+        self.assertCreatedBeforeUse(commands)
+
+    def test_update_not_merged_into_update_before_its_values(self):
+        commands = optimize([
+            command('item_update', 'u1', id=5, content='a'),
+            command('label_add', 'u2', temp_id='L', name='l'),
+            command('item_update', 'u3', id=5, labels=['L']),
+        ]).commands
+        self.assertEqual([cmd['type'] for cmd in commands],
+                         ['item_update', 'label_add', 'item_update'])
+        self.assertCreatedBeforeUse(commands)
+
+    def test_update_merged_into_add(self):
+        optimized = optimize([
+            command('item_add', 'u1', temp_id='T', content='a', project_id=1),
+            command('item_update', 'u2', id='T', content='b'),
+        ])
+        self.assertEqual(len(optimized.commands), 1)
+        self.assertEqual(optimized.commands[0]['args'],
+                         {'content': 'b', 'project_id': 1})
+        self.assertEqual(optimized.covers, {'u1': ['u1', 'u2']})
+
+    def test_add_cancelled_by_delete(self):
+        optimized = optimize([
+            command('item_add', 'u1', temp_id='T', content='a', project_id=1),
+            command('item_update', 'u2', id='T', content='b'),
+            command('item_add', 'u3', temp_id='K', content='c', project_id=1),
+            command('item_delete', 'u4', ids=['T']),
+        ])
+        self.assertEqual([cmd['uuid'] for cmd in optimized.commands], ['u3'])
+        self.assertEqual(optimized.cancelled, ['T'])
+        self.assertEqual(sorted(optimized.dropped), ['u1', 'u2', 'u4'])
+
+    def test_add_used_by_others_not_cancelled(self):
+        optimized = optimize([
+            command('project_add', 'u1', temp_id='P', name='p'),
+            command('item_add', 'u2', temp_id='T', content='a',
+                    project_id='P'),
+            command('project_delete', 'u3', ids=['P']),
+        ])
+        self.assertEqual([cmd['uuid'] for cmd in optimized.commands],
+                         ['u1', 'u2', 'u3'])
+        self.assertEqual(optimized.cancelled, [])
+
+    def test_update_kept_before_delete_of_existing_object(self):
+        optimized = optimize([
+            command('item_update', 'u1', id=5, content='a'),
+            command('item_delete', 'u2', ids=[5]),
+        ])
+        self.assertEqual([cmd['uuid'] for cmd in optimized.commands],
+                         ['u1', 'u2'])
+        self.assertEqual(optimized.dropped, [])
+
+    def test_empty_update_dropped(self):
+        optimized = optimize([command('item_update', 'u1', id=5)])
+        self.assertEqual(optimized.commands, [])
+        self.assertEqual(optimized.dropped, ['u1'])
+
+
+class SplitCommandsTest(unittest.TestCase):
+
+    def test_chunks_end_after_last_use_of_temp_ids(self):
+        commands = [
+            command('project_add', 'u1', temp_id='P', name='p'),
+            command('item_add', 'u2', temp_id='T', content='a',
+                    project_id='P'),
+            command('item_add', 'u3', temp_id='K', content='b', project_id=1),
+            command('item_update', 'u4', id='K', content='c'),
+        ]
+        chunks = split_commands(commands, 3)
+        self.assertEqual([[cmd['uuid'] for cmd in chunk] for chunk in chunks],
+                         [['u1', 'u2'], ['u3', 'u4']])
+
+    def test_temp_id_used_past_the_chunk_size(self):
+        commands = [command('project_add', 'u0', temp_id='P', name='p')] + [
+            command('item_add', 'u%d' % number, temp_id='T%d' % number,
+                    content='a', project_id='P') for number in range(1, 5)]
+        chunks = split_commands(commands, 2)
+        self.assertEqual([len(chunk) for chunk in chunks], [2, 2, 1])
+
+
+class ChunkedCommitTest(unittest.TestCase):
+
+    def test_temp_ids_resolved_for_later_chunks(self):
+        server = FakeTodoistServer()
+        api = TodoistAPI('token', cache=None, transport=server)
+        project = api.projects.add('Work')
+        items = [api.items.add('Task %d' % number, project['id'])
+                 for number in range(3)]
+        api.items.update(items[0]['id'], priority=4)
+        sent = []
+        api.commit(chunk_size=1, progress=lambda done, total: sent.append(done))
+        self.assertEqual(sent, [1, 2, 3, 4])
+        self.assertEqual(len(api.queue), 0)
+        self.assertIsInstance(project['id'], int)
+        self.assertEqual(
+            sorted((data['content'], data['project_id'], data['priority'])
+                   for data in server.objects['items'].values()),
+            [('Task 0', project['id'], 4), ('Task 1', project['id'], 1),
+             ('Task 2', project['id'], 1)])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+import os
+import sys
+import datetime
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__))), 'online-accounts'))
+
+from todoist.api import TodoistAPI
+from todoist.query import Query, QueryEngine, QueryError
+
+
+class RecordingTransport(object):
+    """Answers every request with the same response, and records the calls"""
+
+    def __init__(self, response):
+        self.response = response
+        self.calls = []
+
+    def request(self, method, url, **kwargs):
+        self.calls.append(url.rsplit('/', 1)[-1])
+        return self.response
+
+
+def synced_api(transport=None):
+    api = TodoistAPI('token', cache=None, transport=transport)
+    api._update_state({
+        'projects': [{'id': 1, 'name': 'Work'}],
+        'labels': [{'id': 10, 'name': 'urgent'}],
+        'items': [
+            {'id': 100, 'content': 'a', 'project_id': 1, 'priority': 4,
+             'labels': [10], 'checked': 0, 'item_order': 1},
+            {'id': 101, 'content': 'b', 'project_id': 1, 'priority': 1,
+             'labels': [], 'checked': 0, 'item_order': 2},
+        ],
+        'filters': [{'id': 5, 'name': 'F', 'query': 'p1, @urgent, all'}],
+    })
+    api.sync_token = 'synced'
+    return api
+
+
+class ParseTest(unittest.TestCase):
+
+    def test_text_of_each_part_as_written(self):
+        queries = Query.parse('(p1 | p2) & @work,  today|overdue ,search: a  b')
+        self.assertEqual([query.text for query in queries],
+                         ['(p1 | p2) & @work', 'today|overdue', 'search: a  b'])
+
+    def test_empty_part(self):
+        with self.assertRaises(QueryError):
+            Query.parse('today,,p1')
+
+
+class EngineTest(unittest.TestCase):
+
+    def test_invalid_date_of_the_year_evaluated(self):
+        now = datetime.datetime(2017, 3, 1).timestamp()
+        engine = QueryEngine(synced_api(), now=now)
+        with self.assertRaises(QueryError):
+            engine.items(Query('feb 29', ('term', 'date', 'feb 29')))
+
+    def test_filter_items_listed_once(self):
+        api = synced_api()
+        self.assertEqual([item['id'] for item in api.filters.evaluate(5)],
+                         [100, 101])
+
+
+class QueryFallbackTest(unittest.TestCase):
+
+    def test_local_when_synced(self):
+        transport = RecordingTransport([])
+        api = synced_api(transport)
+        results = api.query(['p1'])
+        self.assertEqual(transport.calls, [])
+        self.assertEqual([item['id'] for item in results[0]['data']], [100])
+
+    def test_server_when_never_synced(self):
+        transport = RecordingTransport([{'query': 'p1', 'data': []}])
+        api = TodoistAPI('token', cache=None, transport=transport)
+        self.assertEqual(api.query(['p1']), transport.response)
+        self.assertEqual(transport.calls, ['query'])
+
+    def test_server_for_unsupported_syntax(self):
+        transport = RecordingTransport([])
+        api = synced_api(transport)
+        api.query(['assigned to: me'])
+        self.assertEqual(transport.calls, ['query'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__))), 'online-accounts'))
+
+from todoist.api import TodoistAPI
+from todoist.store import ObjectStore, collaborator_state_key
+
+
+class Model(object):
+
+    def __init__(self, data, temp_id=''):
+        self.data = data
+        self.temp_id = temp_id
+
+    def __getitem__(self, key):
+        return self.data[key]
+
+
+class ObjectStoreTest(unittest.TestCase):
+
+    def test_lookups_by_id_and_temp_id(self):
+        store = ObjectStore()
+        first, second = Model({'id': 1}), Model({'id': 'T'}, temp_id='T')
+        store.append(first)
+        store.append(second)
+        self.assertIs(store.get(1), first)
+        self.assertIs(store.get('T'), second)
+        self.assertIs(store.get_by_temp_id('T'), second)
+        self.assertIsNone(store.get(3))
+        self.assertEqual(list(store), [first, second])
+
+    def test_reindex_after_temp_id_replaced(self):
+        store = ObjectStore()
+        obj = Model({'id': 'T'}, temp_id='T')
+        store.append(obj)
+        store.pop_changes()
+        obj.data['id'] = 7
+        store.reindex(obj, 'T')
+        self.assertIs(store.get(7), obj)
+        self.assertIs(store.get('T'), obj)
+        self.assertEqual(len(store), 1)
+        self.assertEqual(store.pop_changes(), ([obj], ['T']))
+
+    def test_remove(self):
+        store = ObjectStore()
+        obj = Model({'id': 'T'}, temp_id='T')
+        store.append(obj)
+        store.remove(obj)
+        self.assertIsNone(store.get('T'))
+        self.assertIsNone(store.get_by_temp_id('T'))
+        self.assertNotIn(obj, store)
+        with self.assertRaises(ValueError):
+            store.remove(obj)
+        self.assertEqual(store.pop_changes(), ([], ['T']))
+
+    def test_records_wrapped_when_used(self):
+        store = ObjectStore(factory=Model)
+        store.load([{'id': 1}, {'id': 2}])
+        self.assertFalse(store.dirty)
+        self.assertEqual(list(store.iter_data()), [{'id': 1}, {'id': 2}])
+        obj = store.get(2)
+        self.assertIsInstance(obj, Model)
+        self.assertIs(store.get(2), obj)
+        self.assertEqual([type(obj) for obj in store], [Model, Model])
+
+    def test_collaborator_state_key(self):
+        store = ObjectStore(key=collaborator_state_key)
+        state = Model({'project_id': 1, 'user_id': 2})
+        store.append(state)
+        self.assertIs(store.get((1, 2)), state)
+
+    def test_restore_changes(self):
+        store = ObjectStore()
+        kept, changed_again = Model({'id': 1}), Model({'id': 2})
+        removed = Model({'id': 3})
+        for obj in (kept, changed_again, removed):
+            store.append(obj)
+        store.remove(removed)
+        changes = store.pop_changes()
+        store.remove(changed_again)
+        store.restore_changes(*changes)
+        self.assertEqual(store.pop_changes(), ([kept], [2, 3]))
+
+
+class StateIndexTest(unittest.TestCase):
+
+    def test_objects_found_by_real_id_after_commit(self):
+        api = TodoistAPI('token', cache=None)
+        item = api.items.add('Task', 1)
+        temp_id = item['id']
+        with api._lock:
+            api._apply_temp_id_mapping({temp_id: 1000})
+        self.assertEqual(item['id'], 1000)
+        self.assertIs(api.items.get_by_id(1000, only_local=True), item)
+        self.assertIs(api.state['items'].get(temp_id), item)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+import gc
+import os
+import sys
+import json
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__))), 'online-accounts'))
+
+from todoist.api import TodoistAPI, SyncError, STATE_CHUNK_SIZE
+from todoist.fake import FakeTodoistServer
+from todoist.stream import iter_members
+
+
+def split(text, size):
+    return [text[start:start + size] for start in range(0, len(text), size)]
+
+
+class IterMembersTest(unittest.TestCase):
+
+    document = {'sync_token': 'abc', 'full_sync': True,
+                'items': [{'id': 1, 'content': 'café ✓'},
+                          {'id': 2, 'priority': 1.5, 'labels': [10, 200]}],
+                'projects': [], 'day_orders': {'1': -1}}
+
+    def members(self, chunks):
+        return list(iter_members(chunks, split=('items', 'projects')))
+
+    def test_split_arrays(self):
+        members = self.members([json.dumps(self.document)])
+        self.assertEqual(members, [
+            ('sync_token', 'abc'), ('full_sync', True),
+            ('items', self.document['items'][0]),
+            ('items', self.document['items'][1]),
+            ('day_orders', {'1': -1})])
+
+    def test_any_chunk_size(self):
+        text = json.dumps(self.document, ensure_ascii=False)
+        expected = self.members([text])
+        for size in (1, 2, 3, 7, 64):
+            self.assertEqual(self.members(split(text, size)), expected)
+            self.assertEqual(self.members(split(text.encode('utf-8'), size)),
+                             expected)
+
+    def test_empty_object(self):
+        self.assertEqual(self.members(['{', ' }']), [])
+
+    def test_truncated_document(self):
+        text = json.dumps(self.document)
+        with self.assertRaises(ValueError):
+            self.members(split(text[:-10], 16))
+
+    def test_not_an_object(self):
+        with self.assertRaises(ValueError):
+            self.members(['<html>502</html>'])
+
+
+class StreamTransport(object):
+    """Streams the same text for every request"""
+
+    def __init__(self, text):
+        self.text = text
+
+    def stream(self, method, url, **kwargs):
+        return split(self.text, 100)
+
+
+class StreamedSyncTest(unittest.TestCase):
+
+    def setUp(self):
+        self.server = FakeTodoistServer()
+        project = self.server.add('projects', name='Inbox')
+        for number in range(STATE_CHUNK_SIZE + 10):
+            self.server.add('items', content='Task %d' % number,
+                            project_id=project['id'])
+
+    def synced_api(self, stream):
+        api = TodoistAPI('token', cache=None, transport=self.server)
+        api.sync(stream=stream)
+        return api
+
+    def test_same_state_as_plain_sync(self):
+        plain = self.synced_api(stream=False)
+        streamed = self.synced_api(stream=True)
+        for datatype in ('items', 'projects'):
+            self.assertEqual(
+                sorted(data['id'] for data in streamed[datatype].iter_data()),
+                sorted(data['id'] for data in plain[datatype].iter_data()))
+        self.assertEqual(streamed.sync_token, plain.sync_token)
+
+    def test_merge_timed_with_gc_paused(self):
+        enabled = gc.isenabled()
+        api = self.synced_api(stream=True)
+        metrics = api.metrics.snapshot()
+        self.assertEqual(metrics['histograms']['update_state']['count'], 1)
+        self.assertEqual(metrics['counters']['merged.items'],
+                         STATE_CHUNK_SIZE + 10)
+        self.assertEqual(gc.isenabled(), enabled)
+
+    def test_error_page(self):
+        api = TodoistAPI('token', cache=None,
+                         transport=StreamTransport('<html>502</html>'))
+        with self.assertRaises(SyncError):
+            api.sync(stream=True)
+        self.assertEqual(api.sync_token, '*')
+
+
+if __name__ == '__main__':
+    unittest.main()